@@ -1,3 +1,7 @@
+import logging
+import os
+import time
+import flask
 import dash
 import dash_auth
 import dash_core_components as dcc
@@ -8,35 +12,127 @@ import plotly.graph_objects as go
 from components.navbar import Navbar
 from components.dashboard import Dashboard
 from components.callbacks import Callbacks
+from data_source import LocalSource
 from vaccination_data import VaccinationData
+from data_refresher import DataRefresher
+from metrics import Metrics
+from profiler import CallbackProfiler
+from warm_up import warm_up
 
-data = VaccinationData()
-
-auth = data.get_auth()
-VALID_USERNAME_PASSWORD_PAIRS = {auth[0]: auth[1]}
+logger = logging.getLogger(__name__)
 
 external_stylesheets = [
     "https://codepen.io/chriddyp/pen/bWLwgP.css",
     "https://use.fontawesome.com/releases/v5.8.1/css/all.css",
 ]
 
-app = dash.Dash(
-    __name__,
-    external_stylesheets=external_stylesheets,
-    suppress_callback_exceptions=True,
-)
-auth = dash_auth.BasicAuth(app, VALID_USERNAME_PASSWORD_PAIRS)
 
-server = app.server
+def create_app(data_source=None, snapshot_dir=None):
+    """
+    Load the data and build the Dash application. Nothing is loaded on import, so
+    running this once in the gunicorn master (--preload) shares the data with all
+    workers through copy-on-write.
+    Every worker refreshes the data on its own. With a snapshot directory, one of
+    them downloads the raw data and rebuilds the snapshot and all of them reload its
+    memory-mapped files, so the tables stay shared. Without one, each worker
+    downloads and rebuilds a private copy of the tables on the first data change.
+    Params:
+        data_source: Where to read the data files from, a source (S3Source, LocalSource)
+            or a local directory, defaults to the DATA_DIR env var, else the S3 bucket
+        snapshot_dir: Directory of a preprocessed snapshot to load instead of the raw data
+    Returns:
+        app: The Dash application, app.server is the WSGI application
+    """
+    start = time.perf_counter()
+    data_source = data_source or os.environ.get("DATA_DIR")
+    if isinstance(data_source, str):
+        data_source = LocalSource(data_source)
+    data = VaccinationData(data_source, snapshot_dir)
+    data_seconds = time.perf_counter() - start
+
+    auth = data.get_auth()
+    VALID_USERNAME_PASSWORD_PAIRS = {auth[0]: auth[1]}
+
+    app = dash.Dash(
+        __name__,
+        external_stylesheets=external_stylesheets,
+        suppress_callback_exceptions=True,
+    )
+    auth = dash_auth.BasicAuth(app, VALID_USERNAME_PASSWORD_PAIRS)
+
+    def build_layout():
+        """
+        Returns the layout, with placeholder figures the callbacks replace on load.
+        """
+        navbar = Navbar(data).navbar()
+        dashboard = Dashboard(data).dashboard()
+        return html.Div(
+            children=[dcc.Location(id="url", refresh=False), navbar, dashboard]
+        )
+
+    app.layout = build_layout
+    serve_layout = app.serve_layout
+
+    def cached_layout():
+        """
+        Serves the layout, built and serialized once per data version.
+        """
+        body = data.cached("layout", lambda: serve_layout().get_data())
+        return flask.Response(body, mimetype="application/json")
+
+    app.server.view_functions["/_dash-layout"] = auth.auth_wrapper(cached_layout)
+
+    callbacks = Callbacks(app, data)
+
+    # Keep cProfile profiles of slow callbacks, for every call or when requested
+    profiler = CallbackProfiler(
+        os.environ.get("PROFILE_DIR"),
+        float(os.environ.get("PROFILE_THRESHOLD", 1)),
+        os.environ.get("PROFILE_CALLBACKS") == "1",
+    )
+    profiler.instrument_callbacks(app)
+
+    # Measure every callback and data method, served on /metrics
+    metrics = Metrics(float(os.environ.get("METRICS_SAMPLE_RATE", 1)))
+    metrics.instrument_callbacks(app)
+    metrics.instrument_methods(data, "data")
+    callbacks.fig_cache.on_put = metrics.observe_figure
+    cache_counters = ("hits", "misses")
+    metrics.register(
+        "figure_cache", lambda: callbacks.fig_cache.stats(), cache_counters
+    )
+    metrics.register("data_cache", data.cache_stats, cache_counters)
+    metrics.register("data", lambda: {"version": data.version})
+    app.server.add_url_rule("/metrics", "metrics", auth.auth_wrapper(metrics.view))
+
+    # Precompute every country's page, in a process pool before gunicorn forks and
+    # in the refresher thread (forking a threaded worker isn't safe) after a refresh.
+    # The caches are per process, so after a refresh every worker warms up its own.
+    processes = int(os.environ.get("WARM_UP_PROCESSES", 0))
+    if processes:
+        warm_up(data, callbacks, processes)
+
+    # Threads don't survive a fork, so start refreshing from the serving process.
+    # Set DATA_SNAPSHOT_DIR to rebuild the data once for all workers, see above.
+    refresher = DataRefresher(
+        data,
+        int(os.environ.get("DATA_REFRESH_INTERVAL", 3600)),
+        (lambda: warm_up(data, callbacks)) if processes else None,
+    )
+    app.server.before_request(refresher.start)
+
+    logger.info(
+        "Created app in %.2fs (data %.2fs)", time.perf_counter() - start, data_seconds
+    )
+    return app
 
-navbar = Navbar(data).navbar()
-dashboard = Dashboard(data).dashboard()
 
-app.layout = html.Div(
-    children=[dcc.Location(id="url", refresh=False), navbar, dashboard]
-)
+def create_server(data_source=None, snapshot_dir=None):
+    """
+    WSGI entry point for gunicorn, see Procfile.
+    """
+    return create_app(data_source, snapshot_dir).server
 
-callbacks = Callbacks(app, data)
 
 if __name__ == "__main__":
-    app.run_server(debug=True)
\ No newline at end of file
+    create_app().run_server(debug=True)
\ No newline at end of file
@@ -0,0 +1,45 @@
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+  clientside: {
+    /*
+     * Zooms the vaccination progress chart in the browser instead of rebuilding it.
+     * The zoomed ranges are sent by the server in the figure's layout.meta.
+     */
+    change_axis: function (change_axis, figure) {
+      var graph = document.querySelector("#pred-full-vacc .js-plotly-plot");
+      var meta = figure && figure.layout && figure.layout.meta;
+      if (!graph || !meta || !meta.zoom) {
+        return window.dash_clientside.no_update;
+      }
+      var update = change_axis
+        ? meta.zoom
+        : { "xaxis.autorange": true, "yaxis.autorange": true };
+      window.Plotly.relayout(graph, update);
+      return update;
+    },
+
+    /*
+     * Handles the clicking of the info button on the top stats cards.
+     */
+    show_info: function (n0, n1, n2, n3, n4, info_text) {
+      var num_clicks = [n0, n1, n2, n3, n4];
+      var no_update = window.dash_clientside.no_update;
+      var state_stats = num_clicks.map(function () {
+        return no_update;
+      });
+      var state_header = state_stats.slice();
+      var input_ids = [
+        "update-date",
+        "vaccinated",
+        "threshold",
+        "today",
+        "sparkline",
+      ];
+      var triggered = window.dash_clientside.callback_context.triggered;
+      var index = input_ids.indexOf(triggered[0].prop_id.split(".")[0].slice(0, -5));
+      var desc = num_clicks[index] % 2 ? info_text.infos : info_text.headers;
+      state_stats[index] = { display: num_clicks[index] % 2 ? "none" : "block" };
+      state_header[index] = desc[index];
+      return state_stats.concat(state_header);
+    },
+  },
+});
@@ -0,0 +1,84 @@
+"""
+Check that optimized VaccinationData methods still return what the code they
+replaced returned, on synthetic data.
+Usage:
+    python -m benchmarks.regression [--countries 50] [--days 365]
+"""
+
+import argparse
+import io
+import tempfile
+
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from benchmarks.synthetic_data import StubS3Client, synthetic_raw_df
+from data_source import S3Source
+from vaccination_data import VaccinationData
+
+
+def per_date_global_totals(raw_df):
+    """
+    The Global series as set_cur_df computed it before global_totals, masking
+    raw_df once per unique date.
+    Params:
+        raw_df: The raw data
+    Returns:
+        globl_df: The df with the summed vaccinations per date, sorted by date
+    """
+    new_headers = ["date", "daily_vaccinations", "people_fully_vaccinated"]
+    dates = sorted(list(set(raw_df["date"])))
+    data = []
+    for i, date in enumerate(dates):
+        cur_dates_df = raw_df[raw_df["date"] == date][new_headers]
+        sum_column = list(cur_dates_df.sum(axis=0, numeric_only=True))
+        sum_column.insert(0, date)
+        data.append(sum_column)
+    return pd.DataFrame(data, columns=new_headers)
+
+
+def check_global_totals(data, raw_df):
+    """
+    Assert global_totals matches the per-date loop, on raw_df and on the Global
+    series of the loaded snapshot.
+    """
+    expected = per_date_global_totals(raw_df)
+    assert_frame_equal(data.global_totals(raw_df), expected)
+    globl_df = data.snapshot.globl_df.drop(columns=["cum_vaccinations", "cum_percent"])
+    assert_frame_equal(globl_df, expected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--countries", type=int, default=50)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    raw_df = synthetic_raw_df(args.countries, args.days)
+    # A date on which every country reported without any values
+    empty_date = pd.DataFrame(
+        {
+            "country": raw_df["country"].unique(),
+            "iso_code": raw_df["iso_code"].unique(),
+            "date": (
+                pd.Timestamp(raw_df["date"].max()) + pd.Timedelta(days=1)
+            ).strftime("%Y-%m-%d"),
+        }
+    )
+    raw_df = pd.concat([raw_df, empty_date], ignore_index=True)[raw_df.columns]
+    raw_df = raw_df.sort_values(["country", "date"], ignore_index=True)
+    client = StubS3Client({"_raw_data.csv": raw_df.to_csv(index=False).encode()})
+    source = S3Source("regression", tempfile.mkdtemp(), client=client)
+    data = VaccinationData(source, snapshot_dir="")
+
+    raw_df = data.read_raw_df(io.BytesIO(client.objects["_raw_data.csv"]))
+    last_day = raw_df[raw_df["date"] == raw_df["date"].max()]
+    values = last_day[["daily_vaccinations", "people_fully_vaccinated"]]
+    assert values.isna().all(axis=None), "Expected a date where every value is NaN"
+
+    check_global_totals(data, raw_df)
+    print("global_totals matches the per-date loop")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,253 @@
+"""
+Time the VaccinationData methods, figures and Callbacks handlers on synthetic data.
+Runs offline, the raw data is served by a stubbed S3 client.
+Usage:
+    python -m benchmarks.run [--countries 50] [--days 365] [--repeat 20]
+        [--output results.json] [--compare previous.json]
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+import dash
+import flask
+import pandas as pd
+import plotly.io as pio
+
+from benchmarks.synthetic_data import StubS3Client, synthetic_csv
+from components.callbacks import Callbacks
+from components.country_rankings import CountryRankings
+from components.dashboard import Dashboard
+from components.navbar import Navbar
+from components.top_stats import TopStats
+from components.vaccination_progress import VaccinationProgress
+from data_source import S3Source
+from figure_cache import FigureCache
+from vaccination_data import VaccinationData
+
+TABS = ["percent", "total", "past-week"]
+
+
+def measure(func, repeat, setup=None):
+    """
+    Time func.
+    Params:
+        func: Function without arguments to time
+        repeat: Number of times to call func
+        setup: Function without arguments called before each call, not timed
+    Returns:
+        result: Dict with the min, median and mean time in milliseconds
+    """
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return {
+        "min_ms": round(min(times), 3),
+        "median_ms": round(statistics.median(times), 3),
+        "mean_ms": round(statistics.mean(times), 3),
+        "repeat": repeat,
+    }
+
+
+def data_benchmarks(data, source):
+    """
+    Returns the VaccinationData benchmarks as a dict mapping each name to a
+    (function, setup) pair.
+    """
+    path, etag = source.fetch("_raw_data.csv")
+    raw_df = data.read_raw_df(path)
+    last_date = raw_df["date"].iloc[-1]
+    old_snapshot = data.build_snapshot(
+        {"raw_df": raw_df[raw_df["date"] < last_date].reset_index(drop=True)}, 0
+    )
+    ctry, globl = data.view("Canada"), data.view()
+
+    def clear_cache():
+        data.cache = {}
+
+    benchmarks = {
+        "VaccinationData.__init__": (lambda: VaccinationData(source, ""), None),
+        "read_raw_df": (lambda: data.read_raw_df(path), None),
+        "build_snapshot": (lambda: data.build_snapshot({"raw_df": raw_df}, 0), None),
+        "append_rows (one new day)": (
+            lambda: data.append_rows(old_snapshot, raw_df),
+            None,
+        ),
+        "refresh (unchanged)": (data.refresh, None),
+        "view": (lambda: data.view("Canada"), None),
+        "get_stats (country)": (lambda: data.get_stats(ctry), None),
+        "get_stats (global)": (lambda: data.get_stats(globl), None),
+        "past_week": (lambda: data.past_week(ctry), None),
+        "cum_vacc_percent": (lambda: data.cum_vacc_percent(ctry), None),
+        "country_rankings": (data.country_rankings, None),
+    }
+    for tab in TABS:
+        func = lambda tab=tab: data.top_countries(tab)
+        benchmarks[f"top_countries ({tab})"] = (func, clear_cache)
+        benchmarks[f"top_countries ({tab}, cached)"] = (func, None)
+        benchmarks[f"top_countries ({tab}, all countries)"] = (
+            lambda tab=tab: data.top_countries(tab, all_ctrys=True),
+            clear_cache,
+        )
+    return benchmarks
+
+
+def figure_benchmarks(data):
+    """
+    Returns the figure benchmarks, each figure is built and serialized like
+    FigureCache does.
+    """
+    country_rankings = CountryRankings(data)
+    top_stats = TopStats(data)
+    vaccination_progress = VaccinationProgress(data)
+    ctry = data.view("Canada")
+
+    def clear_cache():
+        data.cache = {}
+
+    def serialized(build):
+        return lambda: pio.to_json(build(), validate=False)
+
+    benchmarks = {
+        "layout": (lambda: (Navbar(data).navbar(), Dashboard(data).dashboard()), None),
+        "sparkline_fig": (serialized(lambda: top_stats.sparkline_fig(ctry)), None),
+        "pred_full_vacc_fig": (
+            serialized(lambda: vaccination_progress.pred_full_vacc_fig(ctry)),
+            None,
+        ),
+    }
+    for tab in TABS:
+        benchmarks[f"rankings_fig ({tab})"] = (
+            serialized(lambda tab=tab: country_rankings.rankings_fig(tab)),
+            clear_cache,
+        )
+        benchmarks[f"map_fig ({tab})"] = (
+            serialized(lambda tab=tab: vaccination_progress.map_fig(tab)),
+            clear_cache,
+        )
+        benchmarks[f"map_fig ({tab}, full)"] = (
+            serialized(lambda tab=tab: vaccination_progress.map_fig(tab, False)),
+            clear_cache,
+        )
+    return benchmarks
+
+
+def callback_benchmarks(data):
+    """
+    Returns the Callbacks handler benchmarks, cold (empty caches) and warm.
+    """
+    app = dash.Dash(__name__)
+    callbacks = Callbacks(app, data)
+
+    def clear_cache():
+        data.cache = {}
+        callbacks.fig_cache = FigureCache()
+
+    def in_request(func, triggered=None):
+        def handler():
+            with app.server.test_request_context():
+                flask.g.triggered_inputs = triggered or []
+                return func()
+
+        return handler
+
+    handlers = {
+        "change_url": in_request(
+            lambda: callbacks.change_url("Canada,CAN", 0),
+            [{"prop_id": "region.value", "value": "Canada,CAN"}],
+        ),
+        "change_page": in_request(lambda: callbacks.change_page("/Canada")),
+        "update_stats": in_request(lambda: callbacks.update_stats("/Canada")),
+        "update_sparkline": in_request(lambda: callbacks.update_sparkline("/Canada")),
+        "update_rankings": in_request(lambda: callbacks.update_rankings("total")),
+        "update_progress (country)": in_request(
+            lambda: callbacks.update_progress("/Canada", "percent")
+        ),
+        "update_progress (global)": in_request(
+            lambda: callbacks.update_progress("/", "percent")
+        ),
+    }
+    benchmarks = {}
+    for name, handler in handlers.items():
+        benchmarks[f"Callbacks.{name}"] = (handler, clear_cache)
+        benchmarks[f"Callbacks.{name} (cached)"] = (handler, None)
+    return benchmarks
+
+
+def compare(results, previous):
+    """
+    Print the change of the median time of each benchmark since a previous run.
+    """
+    print(f"\n{'benchmark':<45}{'before ms':>12}{'after ms':>12}{'change':>10}")
+    for name, result in results["results"].items():
+        before = previous["results"].get(name)
+        if before is None:
+            continue
+        change = result["median_ms"] / max(before["median_ms"], 1e-9) - 1
+        print(
+            f"{name:<45}{before['median_ms']:>12.3f}"
+            f"{result['median_ms']:>12.3f}{change:>+10.1%}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--countries", type=int, default=50)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="Path to write the results to as JSON")
+    parser.add_argument("--compare", help="Path of a previous results JSON file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    client = StubS3Client(
+        {
+            "_raw_data.csv": synthetic_csv(args.countries, args.days),
+            "auth.csv": b"username,password\nadmin,admin\n",
+        }
+    )
+    source = S3Source("benchmark", tempfile.mkdtemp(), client=client)
+    data = VaccinationData(source, snapshot_dir="")
+    print(f"Generated {len(data.raw_df)} rows in {time.perf_counter() - start:.2f}s")
+
+    benchmarks = {}
+    benchmarks.update(data_benchmarks(data, source))
+    benchmarks.update(figure_benchmarks(data))
+    benchmarks.update(callback_benchmarks(data))
+
+    results = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "countries": args.countries,
+            "days": args.days,
+            "rows": len(data.raw_df),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "dash": dash.__version__,
+        },
+        "results": {},
+    }
+    for name, (func, setup) in benchmarks.items():
+        func()  # Warm up
+        results["results"][name] = measure(func, args.repeat, setup)
+        print(f"{name:<45}{results['results'][name]['median_ms']:>12.3f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,132 @@
+import hashlib
+import io
+import numpy as np
+import pandas as pd
+import pycountry
+from botocore.exceptions import ClientError
+
+# Columns of the upstream country_vaccinations.csv, in order
+RAW_COLUMNS = [
+    "country",
+    "iso_code",
+    "date",
+    "total_vaccinations",
+    "people_vaccinated",
+    "people_fully_vaccinated",
+    "daily_vaccinations_raw",
+    "daily_vaccinations",
+    "total_vaccinations_per_hundred",
+    "people_vaccinated_per_hundred",
+    "people_fully_vaccinated_per_hundred",
+    "daily_vaccinations_per_million",
+    "vaccines",
+    "source_name",
+    "source_website",
+]
+
+
+def synthetic_countries(num_ctrys):
+    """
+    Get country names and ISO codes for the synthetic data, Canada always included.
+    Real countries are used first so their populations resolve, then made up ones.
+    Params:
+        num_ctrys: Number of countries
+    Returns:
+        ctrys: List of (country, iso_code)
+    """
+    ctrys = [("Canada", "CAN")] + [
+        (ctry.name, ctry.alpha_3)
+        for ctry in pycountry.countries
+        if ctry.alpha_3 != "CAN"
+    ]
+    ctrys += [(f"Country {i}", f"X{i:02}") for i in range(num_ctrys - len(ctrys))]
+    return sorted(ctrys[:num_ctrys])
+
+
+def synthetic_raw_df(num_ctrys=50, num_days=365, seed=0):
+    """
+    Generate data shaped like the raw data csv, ordered by country, then date.
+    Countries start reporting on different days and the most recent few days are
+    missing for some, like the upstream data.
+    Params:
+        num_ctrys: Number of countries
+        num_days: Number of days, starting on 2020-12-13
+        seed: Seed of the random numbers
+    Returns:
+        raw_df: The synthetic raw data
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2020-12-13", periods=num_days)
+    frames = []
+    for country, iso_code in synthetic_countries(num_ctrys):
+        start = rng.integers(0, max(1, num_days // 3))
+        stop = num_days - rng.integers(0, min(4, num_days - start))
+        days = stop - start
+        daily = np.round(
+            np.linspace(1_000, rng.uniform(10_000, 2_000_000), days)
+            * rng.uniform(0.8, 1.2, days)
+        )
+        daily[0] = np.nan  # No daily value on the first day reported
+        total = np.nancumsum(daily) + rng.integers(100, 10_000)
+        fully = np.where(rng.random(days) > 0.3, np.round(total * 0.3), np.nan)
+        frames.append(
+            pd.DataFrame(
+                {
+                    "country": country,
+                    "iso_code": iso_code,
+                    "date": dates[start:stop].strftime("%Y-%m-%d"),
+                    "total_vaccinations": total,
+                    "people_vaccinated": np.round(total * 0.7),
+                    "people_fully_vaccinated": fully,
+                    "daily_vaccinations_raw": daily,
+                    "daily_vaccinations": daily,
+                    "total_vaccinations_per_hundred": np.round(total / 1e5, 2),
+                    "people_vaccinated_per_hundred": np.round(total * 0.7 / 1e5, 2),
+                    "people_fully_vaccinated_per_hundred": np.round(fully / 1e5, 2),
+                    "daily_vaccinations_per_million": np.round(daily / 10, 0),
+                    "vaccines": "Pfizer/BioNTech",
+                    "source_name": "Ministry of Health",
+                    "source_website": "https://example.com",
+                }
+            )
+        )
+    return pd.concat(frames, ignore_index=True)[RAW_COLUMNS]
+
+
+def synthetic_csv(num_ctrys=50, num_days=365, seed=0):
+    """
+    Generate the raw data csv file.
+    Returns:
+        csv: Contents of the csv file
+    """
+    return synthetic_raw_df(num_ctrys, num_days, seed).to_csv(index=False).encode()
+
+
+class StubS3Client:
+    """
+    Offline stand-in for the boto3 S3 client, serving objects from memory.
+    Supports the conditional get_object calls S3Source makes.
+    """
+
+    def __init__(self, objects):
+        """
+        Params:
+            objects: Dict mapping each key to the object's contents
+        """
+        self.objects = dict(objects)
+        self.calls = 0
+
+    def get_object(self, Bucket, Key, IfNoneMatch=None, **kwargs):
+        self.calls += 1
+        if Key not in self.objects:
+            error = {"Error": {"Code": "NoSuchKey"}, "ResponseMetadata": {}}
+            raise ClientError(error, "GetObject")
+        body = self.objects[Key]
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if IfNoneMatch == etag:
+            error = {
+                "Error": {"Code": "304"},
+                "ResponseMetadata": {"HTTPStatusCode": 304},
+            }
+            raise ClientError(error, "GetObject")
+        return {"Body": io.BytesIO(body), "ETag": etag}
\ No newline at end of file
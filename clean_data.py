@@ -1,26 +1,23 @@
-import pandas as pd
-import os
-
-os.rename("./data/country_vaccinations.csv", "./data/_raw_data.csv")
-df = pd.read_csv("./data/_raw_data.csv")
+"""
+Preprocess the raw data into a snapshot the dashboard loads instead of recomputing it.
+Usage:
+    python clean_data.py [data dir] [snapshot dir]
+Then run the dashboard with DATA_SNAPSHOT_DIR set to the snapshot dir.
+"""
 
-countries = list(set(df["country"]))
-dates = list(set(df["date"]))
-dates.sort()
+import os
+import sys
 
-new_headers = ["date", "daily_vaccinations", "people_fully_vaccinated"]
+from data_source import LocalSource
+from vaccination_data import VaccinationData
 
-for i, country in enumerate(countries):
-    country_df = df[df["country"] == country][new_headers]
-    country_df.to_csv(f"./data/{country}_vaccinations.csv", index=False, header=True)
+data_dir = sys.argv[1] if len(sys.argv) > 1 else "./data"
+snapshot_dir = sys.argv[2] if len(sys.argv) > 2 else os.path.join(data_dir, "snapshot")
 
-data = []
-for i, date in enumerate(dates):
-    cur_dates_df = df[df["date"] == date][new_headers]
-    sum_column = list(cur_dates_df.sum(axis=0, numeric_only=True))
-    sum_column.insert(0, date)
-    data.append(sum_column)
-dates_df = pd.DataFrame(data, columns=new_headers)
-dates_df.head
+raw_path = os.path.join(data_dir, "country_vaccinations.csv")
+if os.path.exists(raw_path):
+    os.replace(raw_path, os.path.join(data_dir, "_raw_data.csv"))
 
-dates_df.to_csv("./data/Global_vaccinations.csv", index=False, header=True)
+# Rebuilt under the same lock as the dashboard's refresh, unless already up to date
+data = VaccinationData(LocalSource(data_dir), snapshot_dir=snapshot_dir)
+print(f"Snapshot of {len(data.raw_df)} rows in {snapshot_dir}")
\ No newline at end of file
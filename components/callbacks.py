@@ -1,6 +1,8 @@
 import dash
-from dash.dependencies import Input, Output, State
+from urllib.parse import unquote
+from dash.dependencies import ClientsideFunction, Input, Output, State
 
+from figure_cache import FigureCache
 from .navbar import Navbar
 from .dashboard import Dashboard
 from .country_rankings import CountryRankings
@@ -18,6 +20,7 @@ class Callbacks:
         self.country_rankings = CountryRankings(data)
         self.top_stats = TopStats(data)
         self.vaccination_progress = VaccinationProgress(data)
+        self.fig_cache = FigureCache()
 
         app.callback(
             Output("url", "pathname"),
@@ -28,20 +31,45 @@ class Callbacks:
 
         app.callback(
             Output("country-rankings-cont", "style"),
+            Output("toggle-cont", "style"),
+            Input("url", "pathname"),
+        )(self.change_page)
+
+        app.callback(
             Output("update-date-stat", "children"),
             Output("vaccinated-stat", "children"),
             Output("threshold-stat", "children"),
             Output("today-stat", "children"),
+            Output("info-text", "data"),
+            Input("url", "pathname"),
+        )(self.update_stats)
+
+        app.callback(
             Output("sparkline-stat", "figure"),
+            Input("url", "pathname"),
+        )(self.update_sparkline)
+
+        app.callback(
             Output("percent-countries", "figure"),
+            Input("country-rankings", "value"),
+        )(self.update_rankings)
+
+        app.callback(
             Output("pred-full-vacc", "figure"),
-            Output("toggle-cont", "style"),
             Input("url", "pathname"),
-            Input("change-axis", "value"),
             Input("country-rankings", "value"),
-        )(self.change_page)
+        )(self.update_progress)
 
-        app.callback(
+        # Handled in the browser by assets/clientside.js
+        app.clientside_callback(
+            ClientsideFunction(namespace="clientside", function_name="change_axis"),
+            Output("pred-full-vacc-axes", "data"),
+            Input("change-axis", "value"),
+            State("pred-full-vacc", "figure"),
+        )
+
+        app.clientside_callback(
+            ClientsideFunction(namespace="clientside", function_name="show_info"),
             Output("update-date-stat", "style"),
             Output("vaccinated-stat", "style"),
             Output("threshold-stat", "style"),
@@ -57,8 +85,38 @@ class Callbacks:
             Input("threshold-info", "n_clicks"),
             Input("today-info", "n_clicks"),
             Input("sparkline-info", "n_clicks"),
+            State("info-text", "data"),
             prevent_initial_call=True,
-        )(self.show_info)
+        )
+
+    def url_view(self, pathname, snapshot=None):
+        """
+        Returns the CountryView for the country in the url, Global if there is none
+        or it isn't in the dropdown (excluded or without population data).
+        Params:
+            snapshot: The DataSnapshot to read, the current one if None
+        """
+        snapshot = snapshot or self.data.snapshot
+        country = unquote(pathname or "").strip("/")
+        if snapshot.country_pop_dict.get(country, 0) <= 0:
+            country = "Global"
+        return self.data.view(country, snapshot=snapshot)
+
+    def figure(self, country, tab, version, build):
+        """
+        Returns the cached figure for the country and tab of a data version.
+        Params:
+            version: The data version build reads
+            build: Function without arguments that returns the figure on a cache miss
+        """
+        return self.fig_cache.get(self.figure_key(country, tab, version), build)
+
+    def figure_key(self, country, tab, version):
+        """
+        Returns the key of the figure for the country, tab and data version in the
+        figure cache.
+        """
+        return (country, tab, version)
 
     def change_url(self, dropdown_value, n_clicks):
         ctx = dash.callback_context
@@ -66,86 +124,79 @@ class Callbacks:
             input_id = None
         else:
             input_id = ctx.triggered[0]["prop_id"].split(".")[0]
-        if input_id and input_id == "nav-header":  # If home button clicked
-            self.data.cur_ctry, self.data.cur_iso = "Global", ""
-        elif input_id:  # If dropdown clicked
-            self.data.cur_ctry, self.data.cur_iso = dropdown_value.split(",")
-        new_dd_val = f"{self.data.cur_ctry},{self.data.cur_iso}"
-        return self.data.cur_ctry, new_dd_val
-
-    def change_page(self, country, change_axis, tab):
-        ctx = dash.callback_context
-        if not ctx.triggered:
-            input_id = None
-        else:
-            input_id = ctx.triggered[0]["prop_id"].split(".")[0]
+        if input_id == "nav-header":  # If home button clicked
+            ctry, iso = "Global", ""
+        else:  # If dropdown clicked
+            ctry, iso = dropdown_value.split(",")
+        new_dd_val = f"{ctry},{iso}"
+        return ctry, new_dd_val
 
-        if input_id == "change-axis":
-            print("True")
-            pred = self.vaccination_progress.pred_full_vacc_fig(change_axis)
-            return [dash.no_update] * 7 + [pred, dash.no_update]
-
-        if input_id == "country-rankings":
-            percent = self.country_rankings.percent_rankings()
-            total = self.country_rankings.total_rankings()
-            past_week = self.country_rankings.past_week_rankings()
-            tab_fig = (
-                percent if tab == "percent" else total if tab == "total" else past_week
-            )
-            pred = self.vaccination_progress.map_fig(tab)
-            return [dash.no_update] * 6 + [tab_fig, pred, dash.no_update]
-
-        self.data.set_cur_df()
-        style = "block" if self.data.cur_ctry == "Global" else "none"
+    def change_page(self, pathname):
+        """
+        Shows the rankings on the Global page and the zoom toggle on country pages.
+        """
+        view = self.url_view(pathname)
+        style = "block" if view.ctry == "Global" else "none"
         page = {"display": style}
-        date, vaccinated, threshold, today = self.data.get_stats()
-        sparkline = self.top_stats.sparkline_fig()
-        print(self.data.cur_ctry)
-        pred = (
-            self.vaccination_progress.map_fig()
-            if self.data.cur_ctry == "Global"
-            else self.vaccination_progress.pred_full_vacc_fig()
-        )
-        show_toggle = "none" if self.data.cur_ctry == "Global" else "block"
+        show_toggle = "none" if view.ctry == "Global" else "block"
         show_toggle = {"display": show_toggle}
-        return (
-            page,
-            date,
-            vaccinated,
-            threshold,
-            today,
-            sparkline,
-            dash.no_update,
-            pred,
-            show_toggle,
+        return page, show_toggle
+
+    def update_stats(self, pathname):
+        """
+        Returns the stats of the top stats cards and the info button texts.
+        """
+        snapshot = self.data.snapshot
+        view = self.url_view(pathname, snapshot)
+        date, vaccinated, threshold, today = self.data.cached(
+            ("stats", view.ctry), lambda: self.data.get_stats(view), view.version
+        )
+        info_text = self.data.cached(
+            "info-text", lambda: self.top_stats.info_text(snapshot), snapshot.version
         )
+        return date, vaccinated, threshold, today, info_text
 
-    def show_info(self, n0, n1, n2, n3, n4):
-        """
-        Handles the clicking of the info button on the top stats cards.
-        """
-        num_clicks = [n0, n1, n2, n3, n4]
-        state_stats = [dash.no_update] * len(num_clicks)
-        state_header = [dash.no_update] * len(num_clicks)
-        input_ids = ["update-date", "vaccinated", "threshold", "today", "sparkline"]
-        infos = [
-            "Data is delayed by a couple days.",
-            "Percentage of total population vaccinated.",
-            "Rough estimate of number of people needed to be vaccinated.",
-            f"Number of people vaccinated {self.data.most_recent_date(self.data.raw_df)}",
-            "Total vaccinations from past 7 days",
-        ]
-        headers = [
-            "Latest Update",
-            "Vaccinated",
-            "Herd Immunity Threshold",
-            "Vaccinated Today",
-            "Daily Vaccinations Past 7 Days",
-        ]
-        ctx = dash.callback_context
-        index = input_ids.index(ctx.triggered[0]["prop_id"].split(".")[0][:-5])
-        style = "none" if num_clicks[index] % 2 else "block"
-        desc = infos if num_clicks[index] % 2 else headers
-        state_stats[index] = {"display": style}
-        state_header[index] = desc[index]
-        return state_stats + state_header
\ No newline at end of file
+    def update_sparkline(self, pathname):
+        """
+        Returns the sparkline of the past week.
+        """
+        view = self.url_view(pathname)
+        return self.figure(
+            view.ctry,
+            "sparkline",
+            view.version,
+            lambda: self.top_stats.sparkline_fig(view),
+        )
+
+    def update_rankings(self, tab):
+        """
+        Returns the bar chart of the selected rankings tab.
+        """
+        snapshot = self.data.snapshot
+        return self.figure(
+            "Global",
+            f"rankings-{tab}",
+            snapshot.version,
+            lambda: self.country_rankings.rankings_fig(tab, snapshot),
+        )
+
+    def update_progress(self, pathname, tab):
+        """
+        Returns the map of the selected rankings tab on the Global page, the
+        vaccination progress chart on country pages.
+        """
+        snapshot = self.data.snapshot
+        view = self.url_view(pathname, snapshot)
+        if view.ctry == "Global":
+            return self.figure(
+                "Global",
+                f"map-{tab}",
+                view.version,
+                lambda: self.vaccination_progress.map_fig(tab, snapshot=snapshot),
+            )
+        return self.figure(
+            view.ctry,
+            "progress",
+            view.version,
+            lambda: self.vaccination_progress.pred_full_vacc_fig(view),
+        )
\ No newline at end of file
@@ -2,16 +2,18 @@ import dash_core_components as dcc
 import dash_html_components as html
 import plotly.graph_objects as go
 
+from .placeholder import placeholder_fig
+
 
 class CountryRankings:
     def __init__(self, data):
         self.data = data
 
-    def percent_rankings(self):
+    def percent_rankings(self, snapshot=None):
         """
         Returns bar chart of top 10 countries with highest vaccination percentages.
         """
-        top_ctrys, bar_clrs = self.data.top_countries_percent()
+        top_ctrys, bar_clrs = self.data.top_countries_percent(snapshot=snapshot)
         fig = go.Figure(
             go.Bar(
                 x=top_ctrys[1], y=top_ctrys[0], orientation="h", marker_color=bar_clrs
@@ -35,11 +37,11 @@ class CountryRankings:
         )
         return fig
 
-    def total_rankings(self):
+    def total_rankings(self, snapshot=None):
         """
         Returns bar chart of top 10 countries with highest total vaccinations.
         """
-        top_ctrys, bar_clrs = self.data.top_countries_total()
+        top_ctrys, bar_clrs = self.data.top_countries_total(snapshot=snapshot)
         fig = go.Figure(
             go.Bar(
                 x=top_ctrys[1], y=top_ctrys[0], orientation="h", marker_color=bar_clrs
@@ -52,11 +54,11 @@ class CountryRankings:
         )
         return fig
 
-    def past_week_rankings(self):
+    def past_week_rankings(self, snapshot=None):
         """
         Returns bar chart of top 10 countries with highest total vaccinations in past week.
         """
-        top_ctrys, bar_clrs = self.data.top_countries_past_week()
+        top_ctrys, bar_clrs = self.data.top_countries_past_week(snapshot=snapshot)
         fig = go.Figure(
             go.Bar(
                 x=top_ctrys[1], y=top_ctrys[0], orientation="h", marker_color=bar_clrs
@@ -71,11 +73,24 @@ class CountryRankings:
         )
         return fig
 
+    def rankings_fig(self, tab="percent", snapshot=None):
+        """
+        Returns the bar chart for the selected tab only.
+        Param:
+            tab: Indicates what data to use (percent, total, or past week)
+            snapshot: The DataSnapshot to rank, the current one if None
+        """
+        if tab == "percent":
+            return self.percent_rankings(snapshot)
+        if tab == "total":
+            return self.total_rankings(snapshot)
+        return self.past_week_rankings(snapshot)
+
     def country_rankings(self):
         """
-        Returns layout for country ranking chart.
+        Returns layout for country ranking chart, the chart is sent by a callback.
         """
-        fig = self.percent_rankings()
+        fig = placeholder_fig(margin=dict(t=5, l=10, b=5, r=10))
         return html.Div(
             className="percent-countries-container",
             id="country-rankings-cont",
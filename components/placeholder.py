@@ -0,0 +1,12 @@
+def placeholder_fig(**layout):
+    """
+    Returns an empty figure shown in the layout until a callback sends the real one.
+    Params:
+        layout: Layout properties of the real figure that affect the size of the graph
+    Returns:
+        fig: The figure as a JSON-ready dict
+    """
+    return {
+        "data": [],
+        "layout": dict(xaxis={"visible": False}, yaxis={"visible": False}, **layout),
+    }
\ No newline at end of file
@@ -2,6 +2,8 @@ import dash_core_components as dcc
 import dash_html_components as html
 import plotly.graph_objects as go
 
+from .placeholder import placeholder_fig
+
 
 class TopStats:
     def __init__(self, data):
@@ -36,11 +38,35 @@ class TopStats:
             ],
         )
 
-    def sparkline_fig(self):
+    def info_text(self, snapshot=None):
+        """
+        Returns the descriptions and headers the info buttons switch between.
+        Param:
+            snapshot: The DataSnapshot to describe, the current one if None
+        """
+        raw_df = (snapshot or self.data.snapshot).raw_df
+        return {
+            "infos": [
+                "Data is delayed by a couple days.",
+                "Percentage of total population vaccinated.",
+                "Rough estimate of number of people needed to be vaccinated.",
+                f"Number of people vaccinated {self.data.most_recent_date(raw_df)}",
+                "Total vaccinations from past 7 days",
+            ],
+            "headers": [
+                "Latest Update",
+                "Vaccinated",
+                "Herd Immunity Threshold",
+                "Vaccinated Today",
+                "Daily Vaccinations Past 7 Days",
+            ],
+        }
+
+    def sparkline_fig(self, view):
         """
-        Returns sparkline visualizing vaccination trend in the past week for the current country.
+        Returns sparkline visualizing vaccination trend in the past week for the view's country.
         """
-        past_week = self.data.past_week()
+        past_week = self.data.past_week(view)
         fig = go.Figure(
             go.Scatter(
                 x=list(range(7)),
@@ -78,8 +104,9 @@ class TopStats:
 
     def sparkline(self):
         """
-        Returns layout for sparkline card.
+        Returns layout for sparkline card, the sparkline is sent by a callback.
         """
+        fig = placeholder_fig(height=38, margin=dict(t=3, l=10, b=3, r=10))
         return html.Div(
             className="top-stats card",
             children=[
@@ -90,7 +117,7 @@ class TopStats:
                 ),
                 html.Div(
                     id="sparkline",
-                    children=self.sparkline_content(self.sparkline_fig()),
+                    children=self.sparkline_content(fig),
                 ),
             ],
         )
@@ -107,5 +134,6 @@ class TopStats:
                 self.top_stat("", "Herd Immunity Threshold", "threshold"),
                 self.top_stat("", "Vaccinnated Today", "today"),
                 self.sparkline(),
+                dcc.Store(id="info-text"),
             ],
         )
\ No newline at end of file
@@ -2,17 +2,20 @@ import dash_daq as daq
 import dash_core_components as dcc
 import dash_html_components as html
 import plotly.graph_objects as go
+import plotly.io as pio
+
+from .placeholder import placeholder_fig
 
 
 class VaccinationProgress:
     def __init__(self, data):
         self.data = data
 
-    def pred_full_vacc_fig(self, change_axis=False):
+    def pred_full_vacc_fig(self, view):
         """
-        Returns line chart of cumulative vaccination percentage over time.
+        Returns line chart of cumulative vaccination percentage over time for the view's country.
         """
-        daily_vacc, dates = self.data.cum_vacc_percent()
+        daily_vacc, dates = self.data.cum_vacc_percent(view)
         fig = go.Figure()
         fig.add_trace(
             go.Scatter(
@@ -24,18 +27,26 @@ class VaccinationProgress:
             yaxis_title="Percentage of Population Vaccinated (%)",
             plot_bgcolor="lightgray",
             margin=dict(t=3, l=10, b=3, r=10),
+            # Ranges the change-axis toggle zooms to in the browser, see assets/clientside.js
+            meta=dict(
+                zoom={
+                    "xaxis.range": [str(dates[0]), self.data.sept.strftime("%Y-%m-%d")],
+                    "yaxis.range": [0, 70],
+                }
+            ),
         )
-        if change_axis:
-            fig.update_xaxes(range=[dates[0], self.data.sept])
-            fig.update_yaxes(range=[0, 70])
         return fig
 
-    def map_fig(self, tab="percent"):
+    def map_fig(self, tab="percent", compact=True, snapshot=None):
         """
         Returns a map visually representing vaccination progress by country.
         Param:
             tab: Indicates what data to use (percent, total, or past week)
+            compact: Only send the countries with data, formatted in the browser
+            snapshot: The DataSnapshot to rank, the current one if None
         """
+        if compact:
+            return self.compact_map_fig(tab, snapshot)
         func_map_data = (
             self.data.top_countries_percent
             if tab == "percent"
@@ -43,7 +54,7 @@ class VaccinationProgress:
             if tab == "total"
             else self.data.top_countries_past_week
         )
-        top_ctrys, log_ctrys = func_map_data(all_ctrys=True)
+        top_ctrys, log_ctrys = func_map_data(all_ctrys=True, snapshot=snapshot)
         percent = "%" if tab == "percent" else ""
         fig = go.Figure(
             data=go.Choropleth(
@@ -72,11 +83,56 @@ class VaccinationProgress:
         )
         return fig
 
+    def compact_map_fig(self, tab="percent", snapshot=None):
+        """
+        Returns the map with a smaller payload: countries without data are left out
+        (drawn as 0 through the land color), values are sent as integers, hover labels
+        are formatted by a hovertemplate and only the used parts of the theme are kept.
+        Param:
+            tab: Indicates what data to use (percent, total, or past week)
+            snapshot: The DataSnapshot to rank, the current one if None
+        """
+        ctrys = self.data.ranked_countries(tab, snapshot)
+        percent = "%" if tab == "percent" else ""
+        theme = pio.templates["plotly"]
+        fig = go.Figure(
+            data=go.Choropleth(
+                marker_line_width=0.1,
+                locationmode="country names",
+                locations=[ctry for ctry, value in ctrys],
+                z=[int(value) for ctry, value in ctrys],
+                zmin=0,
+                hovertemplate=f"%{{z:,}}{percent}<br>%{{location}}<extra></extra>",
+                colorbar=dict(ticksuffix=percent),
+                colorscale=[[0, self.data.clrs["secondary"]], [1, "black"]],
+            ),
+            layout=dict(
+                template=dict(
+                    data=dict(choropleth=theme.data.choropleth),
+                    layout=dict(
+                        font=theme.layout.font,
+                        hoverlabel=theme.layout.hoverlabel,
+                        paper_bgcolor=theme.layout.paper_bgcolor,
+                        geo=theme.layout.geo,
+                    ),
+                )
+            ),
+        )
+        fig.update_geos(
+            showframe=False,
+            showcoastlines=False,
+            projection_type="orthographic",
+            landcolor=self.data.clrs["secondary"],
+        )
+        fig.update_layout(margin=dict(t=5, l=10, b=5, r=10))
+        return fig
+
     def vaccination_progress(self):
         """
         Returns a chart that visually represents the vaccination progress with a map or line chart.
+        The chart is sent by a callback.
         """
-        fig = self.map_fig()
+        fig = placeholder_fig(margin=dict(t=5, l=10, b=5, r=10))
         return html.Div(
             className="pred-full-vacc-container-container",
             children=[
@@ -109,6 +165,7 @@ class VaccinationProgress:
                             figure=fig,
                             config=dict(scrollZoom=True),
                         ),
+                        dcc.Store(id="pred-full-vacc-axes"),
                     ],
                 )
             ],
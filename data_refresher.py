@@ -0,0 +1,66 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class DataRefresher:
+    """
+    Periodically refresh VaccinationData in a background thread.
+    """
+
+    def __init__(self, data, interval=3600, on_refresh=None):
+        """
+        Params:
+            data: The VaccinationData to refresh
+            interval: Seconds between refreshes, refreshing is disabled if 0
+            on_refresh: Function without arguments called after the data changed
+        """
+        self.data = data
+        self.interval = interval
+        self.on_refresh = on_refresh
+        self.stopped = threading.Event()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        """
+        Start the refresh thread, does nothing if disabled or already running.
+        Cheap enough to call on every request, which restarts it in forked workers.
+        """
+        if self.interval <= 0 or (self.thread and self.thread.is_alive()):
+            return
+        with self.lock:
+            if self.thread and self.thread.is_alive():
+                return
+            self.stopped.clear()
+            self.thread = threading.Thread(
+                target=self.run, name="data-refresher", daemon=True
+            )
+            self.thread.start()
+
+    def stop(self):
+        """
+        Stop the refresh thread after the current refresh finishes.
+        """
+        self.stopped.set()
+
+    def run(self):
+        """
+        Refresh the data every interval until stopped, keeping the old data on failure.
+        """
+        while not self.stopped.wait(self.interval):
+            try:
+                version = self.data.version
+                snapshot = self.data.refresh()
+                logger.info(
+                    "Refreshed data to version %s at %s",
+                    snapshot.version,
+                    snapshot.refreshed,
+                )
+                if self.on_refresh and snapshot.version != version:
+                    self.on_refresh()
+            except Exception:
+                logger.exception(
+                    "Data refresh failed, keeping version %s", self.data.version
+                )
\ No newline at end of file
@@ -0,0 +1,135 @@
+import fcntl
+import json
+import os
+import uuid
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+# Tables of a DataSnapshot stored on disk, everything else is derived from them on load
+TABLES = {
+    "raw": "raw_df",
+    "globl": "globl_df",
+    "ctry_series": "ctry_series",
+    "ctry_offsets": "ctry_offsets",
+    "ctry_week": "ctry_week",
+    "ctry_totl": "ctry_totl",
+}
+
+
+@contextmanager
+def snapshot_lock(directory, exclusive=False):
+    """
+    Lock the snapshot in directory across processes, shared while reading it and
+    exclusive while writing it, as writing removes the files of the previous one.
+    Params:
+        directory: Directory of the snapshot
+        exclusive: Take the lock exclusively, to write the snapshot
+    """
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "refresh.lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+
+def write_snapshot(snapshot, directory):
+    """
+    Write the tables of a DataSnapshot to directory as .npy files.
+    Columns sharing a dtype are stored together as one 2D array laid out like a
+    pandas block, so they can be memory-mapped without copying. String and categorical
+    columns are stored as integer codes into a list of unique values kept in the manifest.
+    The manifest is replaced last, so readers always see a complete snapshot.
+    Hold snapshot_lock exclusively while writing if the snapshot may be read meanwhile.
+    Params:
+        snapshot: The DataSnapshot to write
+        directory: Directory to write the snapshot to
+    """
+    os.makedirs(directory, exist_ok=True)
+    build = uuid.uuid4().hex
+    manifest = {"etag": snapshot.etag, "build": build, "tables": {}}
+    for name, field in TABLES.items():
+        df = getattr(snapshot, field)
+        blocks, strings = [], {}
+        for columns in df.columns.groupby(df.dtypes.astype(str)).values():
+            columns = list(columns)
+            if isinstance(df[columns[0]].dtype, pd.CategoricalDtype):
+                for column in columns:
+                    file_name = f"{build}.{name}.{column}.npy"
+                    codes = df[column].cat.codes.to_numpy()
+                    np.save(os.path.join(directory, file_name), codes)
+                    strings[column] = {
+                        "file": file_name,
+                        "categories": df[column].cat.categories.tolist(),
+                        "categorical": True,
+                    }
+            elif pd.api.types.is_string_dtype(df[columns[0]].dtype):
+                for column in columns:
+                    codes, categories = pd.factorize(df[column])
+                    file_name = f"{build}.{name}.{column}.npy"
+                    np.save(os.path.join(directory, file_name), codes.astype("int32"))
+                    strings[column] = {
+                        "file": file_name,
+                        "categories": [str(category) for category in categories],
+                    }
+            else:
+                file_name = f"{build}.{name}.block{len(blocks)}.npy"
+                values = np.ascontiguousarray(df[columns].to_numpy().T)
+                np.save(os.path.join(directory, file_name), values)
+                blocks.append({"file": file_name, "columns": columns})
+        manifest["tables"][name] = {"blocks": blocks, "strings": strings}
+
+    tmp_path = os.path.join(directory, f"{build}.manifest.json")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, os.path.join(directory, "manifest.json"))
+
+    for file_name in os.listdir(directory):  # Remove the previous snapshot
+        if file_name.endswith(".npy") and not file_name.startswith(build):
+            os.remove(os.path.join(directory, file_name))
+
+
+def snapshot_etag(directory):
+    """
+    Get the tag of the raw data the snapshot in directory was built from.
+    Returns:
+        etag: The tag, None if there is no snapshot
+    """
+    try:
+        with open(os.path.join(directory, "manifest.json")) as f:
+            return json.load(f)["etag"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def read_snapshot(directory, mmap_mode="r"):
+    """
+    Read the tables of the snapshot in directory.
+    Numeric and date columns are memory-mapped read-only by default, so every process
+    reading the same snapshot shares one copy through the page cache.
+    Params:
+        directory: Directory the snapshot was written to
+        mmap_mode: Passed to np.load, None reads the columns into memory
+    Returns:
+        etag: Tag of the raw data the snapshot was built from
+        tables: Dict mapping each DataSnapshot field in TABLES to its df
+    """
+    with open(os.path.join(directory, "manifest.json")) as f:
+        manifest = json.load(f)
+    tables = {}
+    for name, table in manifest["tables"].items():
+        frames = []
+        for block in table["blocks"]:
+            values = np.load(
+                os.path.join(directory, block["file"]), mmap_mode=mmap_mode
+            )
+            frames.append(pd.DataFrame(values.T, columns=block["columns"], copy=False))
+        for column, meta in table["strings"].items():
+            codes = np.load(os.path.join(directory, meta["file"]), mmap_mode=mmap_mode)
+            if meta.get("categorical"):
+                values = pd.Categorical.from_codes(codes, meta["categories"])
+            else:
+                # Code -1 marks a missing value, which indexes the trailing NaN
+                values = np.array(meta["categories"] + [np.nan], dtype=object)[codes]
+            frames.append(pd.DataFrame({column: values}))
+        tables[TABLES[name]] = pd.concat(frames, axis=1, copy=False)
+    return manifest["etag"], tables
\ No newline at end of file
@@ -0,0 +1,165 @@
+import fcntl
+import json
+import logging
+import os
+import shutil
+import tempfile
+import boto3
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+
+logger = logging.getLogger(__name__)
+
+
+class LocalSource:
+    """
+    Read data files from a local directory, stand-in for the S3 bucket.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def open(self, key):
+        """
+        Open a file for reading.
+        Params:
+            key: Name of the file in the directory
+        Returns:
+            file: The file opened in binary mode
+        """
+        return open(os.path.join(self.directory, key), "rb")
+
+    def fetch(self, key):
+        """
+        Get the local path of a file.
+        Params:
+            key: Name of the file in the directory
+        Returns:
+            path: Path to the file
+            etag: Tag that changes whenever the file changes
+        """
+        path = os.path.join(self.directory, key)
+        stat = os.stat(path)
+        return path, f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+class S3Source:
+    """
+    Read data files from the S3 bucket, keeping a copy on local disk.
+    The copy is shared by all processes on the machine and only downloaded again
+    when its ETag changes.
+    """
+
+    def __init__(self, bucket_name, cache_dir=None, client=None):
+        """
+        Params:
+            bucket_name: Name of the S3 bucket
+            cache_dir: Directory of the local copies, shared by all processes
+            client: S3 client to use in every process, one is created per process if
+                None (boto3 clients aren't fork-safe, see client)
+        """
+        self.bucket_name = bucket_name
+        self.cache_dir = cache_dir or os.path.join(
+            tempfile.gettempdir(), "covid-19-vaccination-data"
+        )
+        self.shared_client = client
+        self.process_client = None
+        self.client_pid = None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @property
+    def client(self):
+        """
+        The S3 client of the current process, created on first use. A client created
+        before gunicorn forks (--preload) isn't reused by the workers, as its
+        connection pool would be shared with the master.
+        """
+        if self.shared_client is not None:
+            return self.shared_client
+        if self.client_pid != os.getpid():
+            # A session per client, the default session isn't thread-safe
+            self.process_client = boto3.session.Session().client(
+                "s3",
+                config=Config(
+                    connect_timeout=5, read_timeout=30, retries={"max_attempts": 2}
+                ),
+            )
+            self.client_pid = os.getpid()
+        return self.process_client
+
+    def open(self, key):
+        """
+        Stream an object from S3 without caching it on disk.
+        Params:
+            key: Object key in the bucket
+        Returns:
+            body: File-like streaming body of the object
+        """
+        return self.client.get_object(Bucket=self.bucket_name, Key=key)["Body"]
+
+    def fetch(self, key):
+        """
+        Get a local copy of an object, downloading it only if it changed on S3.
+        Falls back to the local copy if S3 can't be reached.
+        Params:
+            key: Object key in the bucket
+        Returns:
+            path: Path to the local copy
+            etag: ETag of the local copy
+        """
+        path = os.path.join(self.cache_dir, key)
+        with open(f"{path}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)  # One download at a time across workers
+            etag = self.cached_etag(path)
+            try:
+                return path, self.download(key, path, etag)
+            except (BotoCoreError, ClientError):
+                if etag is None:
+                    raise
+                logger.exception("Fetching %s failed, using cached copy", key)
+                return path, etag
+
+    def download(self, key, path, etag):
+        """
+        Conditionally download an object to path.
+        Params:
+            key: Object key in the bucket
+            path: Path to store the object at
+            etag: ETag of the copy at path, None if there is none
+        Returns:
+            etag: ETag of the object now at path
+        """
+        params = {"Bucket": self.bucket_name, "Key": key}
+        if etag is not None:
+            params["IfNoneMatch"] = etag
+        try:
+            obj = self.client.get_object(**params)
+        except ClientError as e:
+            if e.response.get("ResponseMetadata", {}).get("HTTPStatusCode") == 304:
+                return etag  # Not modified
+            raise
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                shutil.copyfileobj(obj["Body"], f, 1024 * 1024)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        meta = {"etag": obj["ETag"], "last_modified": str(obj.get("LastModified"))}
+        with open(f"{path}.json", "w") as f:
+            json.dump(meta, f)
+        return obj["ETag"]
+
+    def cached_etag(self, path):
+        """
+        Get the ETag of the local copy at path.
+        Returns:
+            etag: The ETag, None if there is no complete local copy
+        """
+        try:
+            with open(f"{path}.json") as f:
+                etag = json.load(f)["etag"]
+        except (OSError, ValueError, KeyError):
+            return None
+        return etag if os.path.exists(path) else None
\ No newline at end of file
@@ -0,0 +1,85 @@
+import json
+import logging
+import threading
+import plotly.io as pio
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class FigureCache:
+    """
+    Bounded LRU cache of serialized Plotly figures.
+    A hit skips building the figure and plotly's validation and serialization, Dash
+    still JSON-encodes the cached dict into the response.
+    """
+
+    def __init__(self, maxsize=1024, on_put=None):
+        """
+        Params:
+            maxsize: Number of figures kept
+            on_put: Function called with the key and serialized size in bytes of every
+                figure added, e.g. to record the sizes in the metrics
+        """
+        self.maxsize = maxsize
+        self.on_put = on_put
+        self.figs = OrderedDict()
+        self.sizes = {}  # Serialized size in bytes of each cached figure
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        """
+        Get a figure from the cache, building and serializing it on a miss.
+        Params:
+            key: Hashable key, (country, tab, data_version)
+            build: Function without arguments that returns the go.Figure
+        Returns:
+            fig: The figure as a JSON-ready dict, which Dash encodes into the response
+        """
+        with self.lock:
+            if key in self.figs:
+                self.hits += 1
+                self.figs.move_to_end(key)
+                return self.figs[key]
+            self.misses += 1
+        fig_json = pio.to_json(build(), validate=False)
+        logger.debug("Built figure %s (%d bytes)", key, len(fig_json))
+        return self.put(key, fig_json)
+
+    def put(self, key, fig_json):
+        """
+        Add a figure that was already serialized, e.g. by another process.
+        Params:
+            key: Hashable key, (country, tab, data_version)
+            fig_json: The figure as JSON
+        Returns:
+            fig: The figure as a JSON-ready dict
+        """
+        fig = json.loads(fig_json)
+        with self.lock:
+            self.figs[key] = fig
+            self.sizes[key] = len(fig_json)
+            self.figs.move_to_end(key)
+            while len(self.figs) > self.maxsize:
+                old_key, _ = self.figs.popitem(last=False)  # Evict LRU
+                del self.sizes[old_key]
+        if self.on_put:
+            self.on_put(key, len(fig_json))
+        return fig
+
+    def stats(self):
+        """
+        Returns the cache counters.
+        Returns:
+            stats: Dict with the number of hits, misses and cached figures, and the
+                total serialized size of the cached figures in bytes
+        """
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self.figs),
+                "bytes": sum(self.sizes.values()),
+            }
\ No newline at end of file
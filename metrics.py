@@ -0,0 +1,195 @@
+import bisect
+import inspect
+import random
+import threading
+import time
+import flask
+from collections import defaultdict
+from functools import wraps
+from dash.exceptions import PreventUpdate
+
+# Upper bounds of the latency histogram buckets in seconds
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Upper bounds of the payload size histogram buckets in bytes
+SIZE_BUCKETS = (1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000)
+
+
+class Histogram:
+    """
+    Cumulative histogram of observed values.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last one counts values above all
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        """
+        Returns the histogram in the Prometheus text format.
+        """
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class Metrics:
+    """
+    Latency and payload size of instrumented functions, size of the cached figures
+    and the stats of the caches, exposed in the Prometheus text format.
+    """
+
+    def __init__(self, sample_rate=1.0):
+        """
+        Params:
+            sample_rate: Fraction of calls measured, functions aren't wrapped if 0
+        """
+        self.sample_rate = sample_rate
+        self.lock = threading.Lock()
+        self.latency = {}  # (kind, name) -> Histogram
+        self.sizes = {}  # (kind, name) -> Histogram
+        self.errors = defaultdict(int)  # (kind, name) -> Number of exceptions
+        self.stats = {}  # Name -> (Function returning a dict of stats, counter names)
+
+    def instrument(self, func, kind, name, payload=False):
+        """
+        Wrap func to measure its latency.
+        Params:
+            func: The function to measure
+            kind: What func is, e.g. callback, the metrics are named after it
+            name: Name of func in the metrics
+            payload: Also measure the length of the string func returns
+        Returns:
+            wrapper: The wrapped func, func itself if sampling is off
+        """
+        if self.sample_rate <= 0:
+            return func
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if self.sample_rate < 1 and random.random() >= self.sample_rate:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except PreventUpdate:
+                raise
+            except Exception:
+                with self.lock:
+                    self.errors[(kind, name)] += 1
+                raise
+            finally:
+                seconds = time.perf_counter() - start
+                self.observe(self.latency, LATENCY_BUCKETS, (kind, name), seconds)
+            if payload:
+                self.observe(self.sizes, SIZE_BUCKETS, (kind, name), len(result))
+            return result
+
+        return wrapper
+
+    def observe(self, histograms, buckets, key, value):
+        """
+        Add value to the histogram of key in histograms, creating it if missing.
+        """
+        with self.lock:
+            if key not in histograms:
+                histograms[key] = Histogram(buckets)
+            histograms[key].observe(value)
+
+    def observe_figure(self, key, size):
+        """
+        Record the serialized size of a figure added to the figure cache, by tab.
+        Params:
+            key: Key of the figure, (country, tab, data_version)
+            size: Size of the figure in bytes
+        """
+        if self.sample_rate > 0:
+            self.observe(self.sizes, SIZE_BUCKETS, ("figure", key[1]), size)
+
+    def instrument_callbacks(self, app):
+        """
+        Wrap every server side callback registered on app. Dash's wrapper returns
+        the serialized response, so its size is the payload sent to the browser.
+        Params:
+            app: The Dash application, after all callbacks are registered
+        """
+        for callback in app.callback_map.values():
+            func = callback.get("callback")  # Clientside callbacks have none
+            if func is None:
+                continue
+            name = getattr(func, "__wrapped__", func).__name__
+            callback["callback"] = self.instrument(func, "callback", name, True)
+
+    def instrument_methods(self, obj, kind):
+        """
+        Wrap every public method of obj.
+        Params:
+            obj: The object to instrument, e.g. the VaccinationData
+            kind: What obj is, the metrics are named after it
+        """
+        for name, func in inspect.getmembers(type(obj), inspect.isfunction):
+            if not name.startswith("_"):
+                setattr(obj, name, self.instrument(getattr(obj, name), kind, name))
+
+    def register(self, name, stats, counters=()):
+        """
+        Expose the stats of a component, e.g. the hits and misses of a cache.
+        Params:
+            name: Prefix of the metrics
+            stats: Function without arguments returning a dict of numbers
+            counters: Keys of the stats that only ever increase, exported as counters
+                with a _total suffix, the others are gauges
+        """
+        self.stats[name] = (stats, set(counters))
+
+    def render(self):
+        """
+        Returns all metrics in the Prometheus text format.
+        """
+        lines = [
+            "# TYPE dashboard_metrics_sample_rate gauge",
+            f"dashboard_metrics_sample_rate {self.sample_rate}",
+        ]
+        with self.lock:
+            for suffix, histograms in [
+                ("duration_seconds", self.latency),
+                ("response_bytes", self.sizes),
+            ]:
+                metric = None
+                for (kind, name), histogram in sorted(histograms.items()):
+                    if metric != f"dashboard_{kind}_{suffix}":
+                        metric = f"dashboard_{kind}_{suffix}"
+                        lines.append(f"# TYPE {metric} histogram")
+                    lines += histogram.lines(metric, f'name="{name}"')
+            metric = None
+            for (kind, name), count in sorted(self.errors.items()):
+                if metric != f"dashboard_{kind}_errors_total":
+                    metric = f"dashboard_{kind}_errors_total"
+                    lines.append(f"# TYPE {metric} counter")
+                lines.append(f'{metric}{{name="{name}"}} {count}')
+        for prefix, (stats, counters) in self.stats.items():
+            for key, value in stats().items():
+                if key in counters:
+                    metric = f"dashboard_{prefix}_{key}_total"
+                    lines.append(f"# TYPE {metric} counter")
+                else:
+                    metric = f"dashboard_{prefix}_{key}"
+                    lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def view(self):
+        """
+        Flask view serving the metrics.
+        """
+        return flask.Response(self.render(), mimetype="text/plain; version=0.0.4")
\ No newline at end of file
@@ -0,0 +1,113 @@
+import cProfile
+import logging
+import os
+import re
+import tempfile
+import time
+import flask
+from datetime import datetime
+from functools import wraps
+from urllib.parse import parse_qs, unquote, urlsplit
+
+logger = logging.getLogger(__name__)
+
+
+class CallbackProfiler:
+    """
+    Profile Dash callbacks with cProfile and keep the profiles of slow calls.
+    Profiling is opt-in: for every call if enabled, else only for requests from a
+    dashboard page opened with ?profile=1 (all requests are authenticated).
+    """
+
+    def __init__(self, directory=None, threshold=1.0, enabled=False):
+        """
+        Params:
+            directory: Directory to write the profiles to
+            threshold: Seconds a call must take for its profile to be kept
+            enabled: Profile every call, not only the requested ones
+        """
+        self.directory = directory or os.path.join(
+            tempfile.gettempdir(), "covid-19-vaccination-profiles"
+        )
+        self.threshold = threshold
+        self.enabled = enabled
+
+    def requested(self):
+        """
+        Returns if the current request asked to be profiled with ?profile=1, either
+        on the callback request itself or on the dashboard page that sent it.
+        """
+        if not flask.has_request_context():
+            return False
+        if flask.request.args.get("profile") == "1":
+            return True
+        query = urlsplit(flask.request.referrer or "").query
+        return parse_qs(query).get("profile") == ["1"]
+
+    def country(self):
+        """
+        Returns the country of the page the current callback request was sent from.
+        """
+        inputs = getattr(flask.g, "input_values", None) or {}
+        pathname = inputs.get("url.pathname")
+        if pathname is None:
+            pathname = urlsplit(flask.request.referrer or "").path
+        return unquote(pathname).strip("/") or "Global"
+
+    def wrap(self, func, name):
+        """
+        Wrap func to profile it when requested.
+        Params:
+            func: The callback function
+            name: Name of the callback in the file names of the profiles
+        Returns:
+            wrapper: The wrapped func
+        """
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not (self.enabled or self.requested()):
+                return func(*args, **kwargs)
+            profile = cProfile.Profile()
+            start = time.perf_counter()
+            try:
+                return profile.runcall(func, *args, **kwargs)
+            finally:
+                seconds = time.perf_counter() - start
+                if seconds >= self.threshold:
+                    self.dump(profile, name, seconds)
+
+        return wrapper
+
+    def dump(self, profile, name, seconds):
+        """
+        Write a profile to the directory, named after the callback and country.
+        """
+        country = re.sub(r"[^\w-]+", "_", self.country())
+        file_name = "{}-{}-{}-{}ms.prof".format(
+            datetime.now().strftime("%Y%m%d-%H%M%S-%f"),
+            name,
+            country,
+            int(seconds * 1000),
+        )
+        path = os.path.join(self.directory, file_name)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            profile.dump_stats(path)
+        except OSError:
+            logger.exception("Writing profile %s failed", path)
+            return
+        logger.warning(
+            "Slow callback %s took %.2fs, profile in %s", name, seconds, path
+        )
+
+    def instrument_callbacks(self, app):
+        """
+        Wrap every server side callback registered on app.
+        Params:
+            app: The Dash application, after all callbacks are registered
+        """
+        for callback in app.callback_map.values():
+            func = callback.get("callback")  # Clientside callbacks have none
+            if func is not None:
+                callback["callback"] = self.wrap(func, func.__name__)
\ No newline at end of file
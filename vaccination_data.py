@@ -1,11 +1,56 @@
-import boto3
 import copy
+import logging
+import os
+import threading
 import pandas as pd
 import numpy as np
 import pycountry
 import pypopulation
-from datetime import datetime, timedelta
-from io import StringIO
+from datetime import datetime
+from collections import namedtuple
+from contextlib import closing
+from data_source import S3Source
+from data_snapshot import (
+    TABLES,
+    read_snapshot,
+    snapshot_etag,
+    snapshot_lock,
+    write_snapshot,
+)
+
+logger = logging.getLogger(__name__)
+
+# Read-only view of a single country (or Global), safe to share between requests
+CountryView = namedtuple("CountryView", ["ctry", "iso", "df", "pop", "version"])
+
+# Columns of the raw data used by the dashboard and how to parse them
+RAW_DTYPES = {
+    "country": "category",
+    "iso_code": "category",
+    "date": "object",
+    "daily_vaccinations": "float64",
+    "people_fully_vaccinated": "float64",
+}
+
+# All tables derived from one download of the raw data, swapped in as a whole
+DataSnapshot = namedtuple(
+    "DataSnapshot",
+    [
+        "version",
+        "etag",
+        "refreshed",
+        "raw_df",
+        "globl_df",
+        "ctry_series",
+        "ctry_offsets",
+        "ctry_dfs",
+        "ctry_week",
+        "ctry_totl",
+        "country_iso_dict",
+        "country_pop_dict",
+        "dropdown_options",
+    ],
+)
 
 
 class VaccinationData:
@@ -13,7 +58,14 @@ class VaccinationData:
     Process data, 'backend' for Dash application.
     """
 
-    def __init__(self):
+    def __init__(self, source=None, snapshot_dir=None):
+        """
+        Params:
+            source: Where to read the data files from, the S3 bucket if None
+            snapshot_dir: Directory of a preprocessed snapshot (see clean_data.py) to load
+                instead of the raw data, rebuilt when the raw data changes, defaults to
+                the DATA_SNAPSHOT_DIR env var
+        """
         self.months = [
             "Jan",
             "Feb",
@@ -28,11 +80,8 @@ class VaccinationData:
             "Nov",
             "Dec",
         ]
-        self.connect_aws()
-        self.set_raw_df()
         self.globl_pop = 7_800_000_000
         self.herd_imm_thrsh = 70
-        self.set_home()
         self.excld_ctry = [
             "Anguilla",
             "Guernsey",
@@ -40,9 +89,7 @@ class VaccinationData:
             "Northern Cyprus",
             "Saint Helena",
         ]
-        self.ctry_totl = self.country_totals(self.raw_df)
         self.num_ctrys = 195
-        self.dropdown_options = self.dropdown_options()
         self.clrs = {
             "primary": "rgb(65, 151, 203)",
             "secondary": "#C1DDED",
@@ -52,74 +99,385 @@ class VaccinationData:
             "black": "#000",
         }
         self.sept = datetime(2021, 9, 1)
+        self.cache = {}
+        self.cache_version = 0  # Data version of the results in cache
+        self.cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.refresh_lock = threading.Lock()
+        self.snapshot = None
+        self.snapshot_dir = (
+            os.environ.get("DATA_SNAPSHOT_DIR")
+            if snapshot_dir is None
+            else snapshot_dir
+        )
+        self.source = source or self.connect_aws()
+        self.refresh()
+
+    @property
+    def version(self):
+        return self.snapshot.version
+
+    @property
+    def refreshed(self):
+        return self.snapshot.refreshed
+
+    @property
+    def raw_df(self):
+        return self.snapshot.raw_df
+
+    @property
+    def ctry_dfs(self):
+        return self.snapshot.ctry_dfs
+
+    @property
+    def dropdown_options(self):
+        return self.snapshot.dropdown_options
+
+    def refresh(self):
+        """
+        Load the preprocessed snapshot, or download the raw data and update every
+        derived table (rebuilt if history changed), then swap them in at once.
+        Requests keep using the previous snapshot until the new one is complete.
+        Nothing is rebuilt if the data didn't change.
+        Returns:
+            snapshot: The new DataSnapshot
+        """
+        with self.refresh_lock:
+            if self.snapshot_dir:
+                self.update_snapshot_dir()
+                with snapshot_lock(self.snapshot_dir):  # Not removed while read
+                    etag = snapshot_etag(self.snapshot_dir)
+                    if not self.snapshot or self.snapshot.etag != etag:
+                        etag, tables = read_snapshot(self.snapshot_dir)
+            else:
+                path, etag = self.source.fetch("_raw_data.csv")
+            if self.snapshot and self.snapshot.etag == etag:
+                snapshot = self.snapshot._replace(refreshed=datetime.now())
+            else:
+                version = self.snapshot.version + 1 if self.snapshot else 1
+                if not self.snapshot_dir:
+                    raw_df = self.read_raw_df(path)
+                    tables = self.snapshot and self.append_rows(self.snapshot, raw_df)
+                    tables = tables or {"raw_df": raw_df}  # Full rebuild
+                snapshot = self.build_snapshot(tables, version, etag)
+            self.snapshot = snapshot  # Atomic swap
+        return snapshot
+
+    def update_snapshot_dir(self):
+        """
+        Rebuild the snapshot in snapshot_dir if the raw data changed since it was built.
+        Processes sharing snapshot_dir take turns, so the raw data is downloaded and
+        the snapshot rebuilt once, the others find it up to date and only load it.
+        The existing snapshot is kept if the raw data can't be read.
+        """
+        with snapshot_lock(self.snapshot_dir, exclusive=True):
+            try:
+                path, etag = self.source.fetch("_raw_data.csv")
+            except Exception:
+                if snapshot_etag(self.snapshot_dir) is None:
+                    raise
+                logger.exception("Reading the raw data failed, keeping the snapshot")
+                return
+            if snapshot_etag(self.snapshot_dir) == etag:
+                return
+            raw_df = self.read_raw_df(path)
+            tables = self.snapshot and self.append_rows(self.snapshot, raw_df)
+            tables = tables or {"raw_df": raw_df}  # Full rebuild
+            write_snapshot(self.build_snapshot(tables, 0, etag), self.snapshot_dir)
+
+    def build_snapshot(self, tables, version, etag=None):
+        """
+        Build all derived tables that aren't in tables yet.
+        Params:
+            tables: Dict with raw_df (sorted by date) and any precomputed derived tables
+            version: The data version of the snapshot
+            etag: Tag identifying the raw data file
+        Returns:
+            snapshot: DataSnapshot of raw_df and the tables derived from it
+        """
+        raw_df = tables["raw_df"]
+        ctry_totl = tables.get("ctry_totl")
+        if ctry_totl is None:
+            ctry_totl = self.country_populations(self.country_totals(raw_df))
+        globl_df = tables.get("globl_df")
+        if globl_df is None:
+            globl_df = self.global_totals(raw_df)
+        ctry_week = tables.get("ctry_week")
+        if ctry_week is None:
+            ctry_week = self.past_week_totals(raw_df)
+        ctry_series, ctry_offsets = tables.get("ctry_series"), tables.get(
+            "ctry_offsets"
+        )
+        if ctry_series is None or ctry_offsets is None:
+            ctry_series, ctry_offsets = self.country_series(raw_df)
+        country_pop_dict = dict(zip(ctry_totl.country, ctry_totl.population))
+        if "cum_percent" not in globl_df:
+            globl_df = self.cumulative_totals(globl_df, [0], [self.globl_pop])
+        if "cum_percent" not in ctry_series:
+            ctry_series = self.cumulative_totals(
+                ctry_series,
+                ctry_offsets["start"].to_numpy(),
+                [country_pop_dict.get(ctry, 0) for ctry in ctry_offsets["country"]],
+            )
+        return DataSnapshot(
+            version=version,
+            etag=etag,
+            refreshed=datetime.now(),
+            raw_df=raw_df,
+            globl_df=globl_df,
+            ctry_series=ctry_series,
+            ctry_offsets=ctry_offsets,
+            ctry_dfs=self.country_index(ctry_series, ctry_offsets),
+            ctry_week=ctry_week,
+            ctry_totl=ctry_totl,
+            country_iso_dict=dict(zip(ctry_totl.country, ctry_totl.iso_code)),
+            country_pop_dict=country_pop_dict,
+            dropdown_options=self.country_options(ctry_totl),
+        )
+
+    def append_rows(self, snapshot, raw_df):
+        """
+        Update the derived tables of snapshot with the rows of raw_df newer than its
+        most recent date, instead of recomputing them from every row.
+        Params:
+            snapshot: The DataSnapshot raw_df is a newer version of
+            raw_df: The new raw data (sorted by date)
+        Returns:
+            tables: Dict with raw_df and the updated derived tables, None if rows up to
+                the most recent date of snapshot changed and everything must be rebuilt
+        """
+        old_df = snapshot.raw_df
+        num_old = len(old_df)
+        if len(raw_df) < num_old or not num_old:
+            return None
+        if num_old < len(raw_df) and not (
+            raw_df["date"].iloc[num_old] > old_df["date"].iloc[-1]
+        ):
+            return None
+        head_df = raw_df.iloc[:num_old].reset_index(drop=True)
+        for column in RAW_DTYPES:
+            old, head = old_df[column], head_df[column]
+            if isinstance(old.dtype, pd.CategoricalDtype):
+                categories = head.cat.categories
+                if not old.cat.categories.isin(categories).all():
+                    return None
+                old = old.cat.set_categories(categories).cat.codes
+                head = head.cat.codes
+            if not head.equals(old):
+                return None  # History was revised
 
-    def set_home(self):
-        self.cur_ctry = "Global"
-        self.set_cur_df()
-        self.cur_iso = ""
-        self.cur_pop = self.globl_pop
-        self.cur_stats = self.get_stats()
+        new_df = raw_df.iloc[num_old:]
+        if new_df.empty:
+            tables = {field: getattr(snapshot, field) for field in TABLES.values()}
+            return dict(tables, raw_df=raw_df)
+        ctry_totl = snapshot.ctry_totl.drop(columns="population")
+        ctry_totl = pd.concat(
+            [ctry_totl, self.country_totals(new_df)], ignore_index=True
+        )
+        ctry_totl = ctry_totl.groupby(["country", "iso_code"], as_index=False)[
+            "daily_vaccinations"
+        ].sum()
+        cumulative = ["cum_vaccinations", "cum_percent"]  # Recomputed once merged
+        new_series, new_offsets = self.country_series(new_df)
+        ctry_series, ctry_offsets = self.merge_country_series(
+            snapshot.ctry_series.drop(columns=cumulative),
+            snapshot.ctry_offsets,
+            new_series,
+            new_offsets,
+        )
+        globl_df = snapshot.globl_df.drop(columns=cumulative)
+        return {
+            "raw_df": raw_df,
+            "globl_df": pd.concat(
+                [globl_df, self.global_totals(new_df)], ignore_index=True
+            ),
+            "ctry_series": ctry_series,
+            "ctry_offsets": ctry_offsets,
+            "ctry_week": self.past_week_totals(raw_df),
+            "ctry_totl": self.country_populations(ctry_totl),
+        }
 
     def connect_aws(self):
         """
-        Connect to AWS using credentials and create a client to connect to S3.
+        Connect to AWS using credentials and create a source reading from S3.
+        Returns:
+            source: S3Source for the data bucket, cached on local disk
         """
-        self.client = boto3.client("s3")
         self.bucket_name = "covid-19-vaccination-data"
+        return S3Source(self.bucket_name, os.environ.get("DATA_CACHE_DIR"))
 
     def get_auth(self):
-        file_name = "auth.csv"
-        object_key = file_name
-        csv_obj = self.client.get_object(Bucket=self.bucket_name, Key=object_key)
-        body = csv_obj["Body"]
-        csv_string = body.read().decode("utf-8")
-        return pd.read_csv(StringIO(csv_string)).values[0]
+        with closing(self.source.open("auth.csv")) as body:
+            return pd.read_csv(body).values[0]
 
-    def set_raw_df(self):
+    def read_raw_df(self, path):
         """
-        Set cur_df by reading csv file from S3 bucket.
+        Read the raw data csv file, parsing only the columns the dashboard uses.
         Params:
-            file_name: file name of the csv file to read from, use current country file if none passed
-            raw: Sets raw_df if true, cur_df if false
-        """
-        file_name = "_raw_data.csv"
-        object_key = file_name
-        csv_obj = self.client.get_object(Bucket=self.bucket_name, Key=object_key)
-        body = csv_obj["Body"]
-        csv_string = body.read().decode("utf-8")
-        self.raw_df = pd.read_csv(StringIO(csv_string))
-
-    def set_cur_df(self):
-        """"""
+            path: Local path or binary file object of the csv file
+        Returns:
+            raw_df: The raw data with parsed dates, sorted by date
+        """
+        raw_df = pd.read_csv(path, usecols=list(RAW_DTYPES), dtype=RAW_DTYPES)
+        raw_df["date"] = pd.to_datetime(raw_df["date"], format="%Y-%m-%d")
+        return raw_df.sort_values("date", kind="mergesort", ignore_index=True)
+
+    def global_totals(self, cur_df):
+        """
+        Condense cur_df such that each row represents the global total for a date.
+        Params:
+            cur_df: The df to condense
+        Returns:
+            globl_df: The df with the summed vaccinations per date, sorted by date
+        """
+        return cur_df.groupby("date", as_index=False)[
+            ["daily_vaccinations", "people_fully_vaccinated"]
+        ].sum()
+
+    def country_series(self, cur_df):
+        """
+        Order cur_df by country such that each country's rows are one contiguous block.
+        Params:
+            cur_df: The df to order (sorted by date)
+        Returns:
+            ctry_series: The date and vaccination columns ordered by country, then date
+            ctry_offsets: The df with the start and stop row of each country in ctry_series
+        """
         new_headers = ["date", "daily_vaccinations", "people_fully_vaccinated"]
-        if self.cur_ctry == "Global":
-            dates = sorted(list(set(self.raw_df["date"])))
-            data = []
-            for i, date in enumerate(dates):
-                cur_dates_df = self.raw_df[self.raw_df["date"] == date][new_headers]
-                sum_column = list(cur_dates_df.sum(axis=0, numeric_only=True))
-                sum_column.insert(0, date)
-                data.append(sum_column)
-            self.cur_df = pd.DataFrame(data, columns=new_headers)
-        else:
-            self.cur_df = self.raw_df[self.raw_df["country"] == self.cur_ctry][
-                new_headers
-            ]
+        cur_df = cur_df.sort_values("country", kind="mergesort")
+        ctry_series = cur_df[new_headers].reset_index(drop=True)
+        codes = cur_df["country"].cat.codes.to_numpy()
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        ctry_offsets = pd.DataFrame(
+            {
+                "country": cur_df["country"].cat.categories[codes[starts]],
+                "start": starts,
+                "stop": np.r_[starts[1:], len(codes)],
+            }
+        )
+        return ctry_series, ctry_offsets
 
-    def dropdown_options(self):
+    def cumulative_totals(self, cur_df, starts, pops):
+        """
+        Add the running total of vaccinations and the percentage of the population it
+        covers to cur_df, restarting at the first row of each country.
+        Params:
+            cur_df: The df with the daily vaccinations of one or more countries in a row
+            starts: The first row of each country in cur_df
+            pops: The population of each country
+        Returns:
+            cur_df: cur_df with added cum_vaccinations and cum_percent columns
+        """
+        totl = np.nancumsum(cur_df["daily_vaccinations"].to_numpy())
+        lengths = np.diff(np.r_[starts, len(cur_df)])
+        totl -= np.repeat(np.r_[0, totl][starts], lengths)  # Restart each country
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percent = totl / np.repeat(np.asarray(pops, dtype="float64"), lengths) * 100
+        return cur_df.assign(cum_vaccinations=totl, cum_percent=percent)
+
+    def country_index(self, ctry_series, ctry_offsets):
+        """
+        Split ctry_series into one df per country without copying it.
+        Params:
+            ctry_series: The date and vaccination columns ordered by country, then date
+            ctry_offsets: The df with the start and stop row of each country in ctry_series
+        Returns:
+            ctry_dfs: Dict mapping each country to its df
+        """
+        return {
+            country: ctry_series.iloc[start:stop]
+            for country, start, stop in zip(
+                ctry_offsets["country"], ctry_offsets["start"], ctry_offsets["stop"]
+            )
+        }
+
+    def merge_country_series(self, ctry_series, ctry_offsets, new_series, new_offsets):
+        """
+        Append the rows of new_series to the block of their country in ctry_series.
+        Params:
+            ctry_series: The date and vaccination columns ordered by country, then date
+            ctry_offsets: The df with the start and stop row of each country in ctry_series
+            new_series: The newer rows, ordered the same way
+            new_offsets: The df with the start and stop row of each country in new_series
+        Returns:
+            ctry_series: The merged date and vaccination columns
+            ctry_offsets: The df with the start and stop row of each country in ctry_series
+        """
+        blocks = {}
+        for country, start, stop in zip(
+            ctry_offsets["country"], ctry_offsets["start"], ctry_offsets["stop"]
+        ):
+            blocks[country] = [np.arange(start, stop)]
+        for country, start, stop in zip(
+            new_offsets["country"], new_offsets["start"], new_offsets["stop"]
+        ):
+            rows = np.arange(start, stop) + len(ctry_series)
+            blocks.setdefault(country, []).append(rows)
+
+        countries = sorted(blocks)
+        rows = [np.concatenate(blocks[country]) for country in countries]
+        stops = np.cumsum([len(block) for block in rows])
+        ctry_series = pd.concat([ctry_series, new_series], ignore_index=True)
+        ctry_series = ctry_series.take(np.concatenate(rows)).reset_index(drop=True)
+        ctry_offsets = pd.DataFrame(
+            {"country": countries, "start": np.r_[0, stops[:-1]], "stop": stops}
+        )
+        return ctry_series, ctry_offsets
+
+    def past_week_totals(self, cur_df):
+        """
+        Total vaccinations per country over the 7 days before the most recent date.
+        Params:
+            cur_df: The df to condense (sorted by date)
+        Returns:
+            ctry_week: The df with each countries past week totals per row
+        """
+        dates = cur_df["date"].values
+        start = dates.searchsorted(dates[-1] - np.timedelta64(7, "D"), side="left")
+        return self.country_totals(cur_df.iloc[start:])
+
+    def view(self, country="Global", iso=None, snapshot=None):
+        """
+        Get the data for a single country without modifying any shared state.
+        Params:
+            country: The country to get the data for, or "Global"
+            iso: The ISO code of the country, looked up from the country if None
+            snapshot: The DataSnapshot to read, the current one if None
+        Returns:
+            view: CountryView with the country's name, ISO code, df, population and
+                the data version it was read from
+        """
+        snapshot = snapshot or self.snapshot
+        if country == "Global":
+            return CountryView(
+                "Global", "", snapshot.globl_df, self.globl_pop, snapshot.version
+            )
+        if iso is None:
+            iso = snapshot.country_iso_dict.get(country, "")
+        return CountryView(
+            country,
+            iso,
+            snapshot.ctry_dfs[country],
+            snapshot.country_pop_dict.get(country, 0),
+            snapshot.version,
+        )
+
+    def country_options(self, ctry_totl):
         """
         Gets a list of all the countries included in the dataset (for the dropdown).
         Excludes countries that we can't get population data for.
+        Params:
+            ctry_totl: The df with each countries totals and population per row
         Returns:
             dropdown_options: The list of countries that will be used in the dropdown
         """
         dropdown_options = [
             {"label": country, "value": f"{country},{iso_code}"}
-            for country, iso_code in np.unique(
-                self.raw_df[["country", "iso_code"]].dropna().values.astype("<U22"),
-                axis=0,
+            for country, iso_code, pop in zip(
+                ctry_totl["country"], ctry_totl["iso_code"], ctry_totl["population"]
             )
-            if country not in self.excld_ctry
+            if pop > 0  # Excluded and without ISO code or known population
         ]
         dropdown_options.sort(key=lambda x: x["label"])
         global_option = {"label": "Global", "value": "Global,"}
@@ -134,45 +492,49 @@ class VaccinationData:
         Returns:
             ctry_totl: The df with each countries totals per row
         """
-        ctry_totl = cur_df.groupby(["country", "iso_code"], as_index=False)[
+        ctry_totl = cur_df.groupby(
+            ["country", "iso_code"], as_index=False, observed=True
+        )[
             "daily_vaccinations"
         ].sum()  # Total vaccinations by country
-        ctry_totl["iso_code"].fillna("", inplace=True)  # Clean dataset
-        self.country_iso_dict = dict(zip(ctry_totl.country, ctry_totl.iso_code))
+        ctry_totl = ctry_totl.astype({"country": object, "iso_code": object})
+        ctry_totl["iso_code"] = ctry_totl["iso_code"].fillna("")  # Clean dataset
+        return ctry_totl
+
+    def country_populations(self, ctry_totl):
+        """
+        Add the population of each country to ctry_totl, resolved once by ISO code.
+        Excluded countries and unknown ISO codes get a population of 0.
+        Params:
+            ctry_totl: The df with each countries totals per row
+        Returns:
+            ctry_totl: ctry_totl with an added population column
+        """
+        pops = {
+            iso: (pypopulation.get_population(iso) or 0) if iso else 0
+            for iso in ctry_totl["iso_code"].unique()
+        }
+        ctry_totl["population"] = ctry_totl["iso_code"].map(pops).astype("int64")
+        ctry_totl.loc[ctry_totl["country"].isin(self.excld_ctry), "population"] = 0
         return ctry_totl
 
-    def get_stats(self):
+    def get_stats(self, view):
         """
         Returns all the stats for the top cards.
+        Params:
+            view: The CountryView to get the stats for
         Returns:
             date: The most recent date in the dataframe
             vaccinated: Percentage of population vaccinated
             threshold: Percentage of people to be vaccinated for herd immunity
             today: Number of vaccinations today
         """
-        date = datetime.strptime(self.most_recent_date(self.cur_df).strip(), "%Y-%m-%d")
+        date = view.df["date"].iloc[-1]
         date = "{} {}".format(self.months[date.month - 1], date.day)
-        self.cur_pop = (
-            self.globl_pop
-            if self.cur_ctry == "Global"
-            else pypopulation.get_population(self.cur_iso)
-        )
-        vaccinated = (
-            str(
-                round(
-                    self.cur_df["daily_vaccinations"].sum(axis=0) / self.cur_pop * 100,
-                    1,
-                )
-            )
-            + "%"
-        )
+        vaccinated = str(round(view.df["cum_percent"].iloc[-1], 1)) + "%"
         threshold = f"{self.herd_imm_thrsh}%"
         today = "{:,}".format(
-            int(
-                float(
-                    self.cur_df.iloc[[-1]]["daily_vaccinations"].to_string(index=False)
-                )
-            )
+            int(float(view.df.iloc[[-1]]["daily_vaccinations"].to_string(index=False)))
         )
         return date, vaccinated, threshold, today
 
@@ -184,7 +546,7 @@ class VaccinationData:
         Returns:
             date: The most recent date in the cur_df
         """
-        date = cur_df.iloc[[-1]]["date"].to_string(index=False).strip()
+        date = cur_df["date"].iloc[-1].strftime("%Y-%m-%d")
         return date
 
     def get_top_countries(self, ctrys, all_ctrys=False):
@@ -220,105 +582,209 @@ class VaccinationData:
         top_ctrys = list(zip(*top_ctrys))
         return top_ctrys
 
-    def top_countries_percent(self, all_ctrys=False):
+    def cached(self, key, func, version=None):
         """
-        Get top 10 countries with highest vaccination percentages.
+        Memoize the result of func for a data version.
+        Params:
+            key: Hashable key identifying the result
+            func: Function without arguments that computes the result
+            version: The data version func reads, the current one if None
+        Returns:
+            result: The cached result of func, computed if missing or outdated
+        """
+        version = self.version if version is None else version
+        key = (version, key)
+        cache = self.cache  # Replaced, never cleared, when the data reloads
+        if key in cache:
+            with self.cache_lock:
+                self.cache_hits += 1
+            return cache[key]
+        with self.cache_lock:
+            self.cache_misses += 1
+        result = func()
+        self.put(key[1], result, version)
+        return result
+
+    def put(self, key, result, version):
+        """
+        Add a result that was already computed, e.g. by another process, without
+        counting a hit or miss.
+        Params:
+            key: Hashable key identifying the result
+            result: The result to cache
+            version: The data version the result was computed from
+        """
+        with self.cache_lock:
+            if version > self.cache_version:
+                self.cache = {}  # Data reloaded, drop outdated results
+                self.cache_version = version
+            if version == self.cache_version:
+                self.cache[(version, key)] = result
+
+    def cache_stats(self):
+        """
+        Returns the counters of the memoized results.
+        Returns:
+            stats: Dict with the number of hits, misses and cached results
+        """
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "size": len(self.cache),
+        }
+
+    def country_rankings(self, snapshot=None):
+        """
+        Compute every ranking metric for all countries we can get population data for.
         Params:
+            snapshot: The DataSnapshot to rank, the current one if None
+        Returns:
+            rankings: df with the country and its percent, total and past-week measures
+        """
+        snapshot = snapshot or self.snapshot
+        ctry_totl = snapshot.ctry_totl[snapshot.ctry_totl["population"] > 0]
+        past_week = snapshot.ctry_week.rename(
+            columns={"daily_vaccinations": "past-week"}
+        )
+        rankings = pd.DataFrame(
+            {
+                "country": ctry_totl["country"],
+                "iso_code": ctry_totl["iso_code"],
+                "percent": np.minimum(
+                    100,
+                    np.floor(
+                        ctry_totl["daily_vaccinations"] / ctry_totl["population"] * 100
+                    ),
+                ),
+                "total": ctry_totl["daily_vaccinations"],
+            }
+        )
+        return rankings.merge(past_week, how="left", on=["country", "iso_code"])
+
+    def ranked_countries(self, metric, snapshot=None):
+        """
+        Get all countries ordered by metric, shared by the bar chart and the map.
+        Params:
+            metric: The measure to order by (percent, total, or past-week)
+            snapshot: The DataSnapshot to rank, the current one if None
+        Returns:
+            ranked: List of (country, measure) ordered from highest to lowest
+        """
+        snapshot = snapshot or self.snapshot
+
+        def rank():
+            rankings = self.cached(
+                "rankings", lambda: self.country_rankings(snapshot), snapshot.version
+            )
+            rankings = rankings[rankings[metric].notna()]
+            values = rankings[metric].tolist()
+            if metric == "percent":
+                values = [int(value) for value in values]
+            ranked = list(zip(rankings["country"].tolist(), values))
+            ranked.sort(key=lambda x: x[1], reverse=True)
+            return ranked
+
+        return self.cached(("ranked", metric), rank, snapshot.version)
+
+    def top_countries(self, metric, all_ctrys=False, snapshot=None):
+        """
+        Get top 10 countries by metric, cached until the data reloads.
+        Params:
+            metric: The measure to order by (percent, total, or past-week)
             all_ctrys: Returns all countries if True, top 10 + Canada if False
+            snapshot: The DataSnapshot to rank, the current one if None
         Returns:
-            top_ctrys: The top 10 countries by percentage and Canada
+            top_ctrys: The top 10 countries by metric and Canada
             bar_clrs: List of colors for bar graph
         """
-        pctg = []  # Percentage
-        for i, ctry_row in self.ctry_totl.iterrows():
-            c_ctry, c_iso, c_vacc = ctry_row
-            pop = 0
-            if c_iso != "":
-                pop = pypopulation.get_population(c_iso)
-            if pop:
-                pctg.append([c_ctry, min(100, int(c_vacc / pop * 100))])
-        top_ctrys = self.get_top_countries(pctg, all_ctrys)
-
-        num_over_thrsh = sum(1 for x in top_ctrys[1] if x > 70)
-        bar_clrs = [self.clrs["primary"]] * num_over_thrsh + [self.clrs["white"]] * (
-            11 - num_over_thrsh
+        snapshot = snapshot or self.snapshot
+        return self.cached(
+            (metric, all_ctrys),
+            lambda: self.rank_countries(metric, all_ctrys, snapshot),
+            snapshot.version,
         )
-        bar_clrs[10] = self.clrs["red"]  # Make Canada bar red
+
+    def rank_countries(self, metric, all_ctrys=False, snapshot=None):
+        """
+        Get the top 10 + Canada (or all countries) from the ranked countries.
+        Params:
+            metric: The measure to order by (percent, total, or past-week)
+            all_ctrys: Returns all countries if True, top 10 + Canada if False
+            snapshot: The DataSnapshot to rank, the current one if None
+        Returns:
+            top_ctrys: The top 10 countries by metric and Canada
+            bar_clrs: List of colors for bar graph
+        """
+        ctrys = [list(ctry) for ctry in self.ranked_countries(metric, snapshot)]
+        top_ctrys = self.get_top_countries(ctrys, all_ctrys)
+
+        if metric == "percent":
+            num_over_thrsh = sum(1 for x in top_ctrys[1] if x > 70)
+            bar_clrs = [self.clrs["primary"]] * num_over_thrsh + [
+                self.clrs["white"]
+            ] * (11 - num_over_thrsh)
+            bar_clrs[10] = self.clrs["red"]  # Make Canada bar red
+        else:
+            bar_clrs = [self.clrs["primary"]] * 10 + [self.clrs["red"]]
         bar_clrs.reverse()
         return top_ctrys, bar_clrs
 
-    def top_countries_total(self, all_ctrys=False):
+    def top_countries_percent(self, all_ctrys=False, snapshot=None):
         """
-        Get top 10 countrieswith highest total vaccinations.
+        Get top 10 countries with highest vaccination percentages.
         Params:
             all_ctrys: Returns all countries if True, top 10 + Canada if False
+            snapshot: The DataSnapshot to rank, the current one if None
+        Returns:
+            top_ctrys: The top 10 countries by percentage and Canada
+            bar_clrs: List of colors for bar graph
+        """
+        return self.top_countries("percent", all_ctrys, snapshot)
+
+    def top_countries_total(self, all_ctrys=False, snapshot=None):
+        """
+        Get top 10 countries with highest total vaccinations.
+        Params:
+            all_ctrys: Returns all countries if True, top 10 + Canada if False
+            snapshot: The DataSnapshot to rank, the current one if None
         Returns:
             top_ctrys: The top 10 countries by total and Canada
             bar_clrs: List of colors for bar graph
         """
-        totl = []
-        for i, ctry_row in self.ctry_totl.iterrows():
-            c_ctry, c_iso, c_vacc = ctry_row
-            pop = 0
-            if c_iso != "":
-                pop = pypopulation.get_population(c_iso)
-            if pop:
-                totl.append([c_ctry, c_vacc])
-        top_ctrys = self.get_top_countries(totl, all_ctrys)
-
-        bar_clrs = [self.clrs["primary"]] * 10 + [self.clrs["red"]]
-        bar_clrs.reverse()
-        return top_ctrys, bar_clrs
+        return self.top_countries("total", all_ctrys, snapshot)
 
-    def top_countries_past_week(self, all_ctrys=False):
+    def top_countries_past_week(self, all_ctrys=False, snapshot=None):
         """
         Get top 10 countries with highest total vaccinations in past week.
         Params:
             all_ctrys: Returns all countries if True, top 10 + Canada if False
+            snapshot: The DataSnapshot to rank, the current one if None
         Returns:
             top_ctrys: The top 10 countries by total in the past week and Canada
             bar_clrs: List of colors for bar graph
         """
-        totl = []
-        date = self.most_recent_date(self.raw_df)
-        date_week_ago = datetime.strptime(date.strip(), "%Y-%m-%d") - timedelta(days=7)
-        cur_df = self.raw_df.drop(
-            self.raw_df[
-                self.raw_df.date.map(lambda x: datetime.strptime(x, "%Y-%m-%d"))
-                < date_week_ago
-            ].index
-        )
-        ctry_totl = self.country_totals(cur_df)
-        for i, ctry_row in ctry_totl.iterrows():
-            c_ctry, c_iso, c_vacc = ctry_row
-            pop = 0
-            if c_iso != "":
-                pop = pypopulation.get_population(c_iso)
-            if pop:
-                totl.append([c_ctry, c_vacc])
-        top_ctrys = self.get_top_countries(totl, all_ctrys)
-        bar_clrs = [self.clrs["primary"]] * 10 + [self.clrs["red"]]
-        bar_clrs.reverse()
-        return top_ctrys, bar_clrs
+        return self.top_countries("past-week", all_ctrys, snapshot)
 
-    def past_week(self):
+    def past_week(self, view):
         """
-        Return last 7 days of current dataframe (exclude most recent day on global dataframe).
+        Return last 7 days of the view's dataframe (exclude most recent day on global dataframe).
+        Params:
+            view: The CountryView to get the past week for
         Returns:
-            past_week: Data corrisponding to last 7 days of current dataframe
+            past_week: Data corrisponding to last 7 days of the view's dataframe
         """
-        past_week = self.cur_df.tail(7) if self.cur_iso else self.cur_df.tail(8)[:-1]
+        past_week = view.df.tail(7) if view.iso else view.df.tail(8)[:-1]
         return past_week
 
-    def cum_vacc_percent(self):
+    def cum_vacc_percent(self, view):
         """
         Returns cumulative percentage of population vaccinated over time.
+        Params:
+            view: The CountryView to get the cumulative percentage for
         Returns:
             daily_vacc: Cumulative percentage of vaccinations per day
-            dates: array of all dates in the current df
+            dates: array of all dates in the view's df
         """
-        daily_vacc = (
-            np.nancumsum(self.cur_df["daily_vaccinations"].values) / self.cur_pop * 100
-        )
-        dates = self.cur_df["date"].values
+        daily_vacc = view.df["cum_percent"].values
+        dates = view.df["date"].values.astype("datetime64[D]")
         return daily_vacc, dates
\ No newline at end of file
@@ -0,0 +1,105 @@
+import logging
+import multiprocessing
+import resource
+import time
+import plotly.io as pio
+
+logger = logging.getLogger(__name__)
+
+TABS = ["percent", "total", "past-week"]
+
+# (data, callbacks, snapshot) to warm up, inherited by the forked worker processes
+warm_up_state = None
+
+
+def build_country(country):
+    """
+    Build the stats and serialized figures of a country's page.
+    Params:
+        country: The country, or Global
+    Returns:
+        country: The country
+        stats: The stats of the top stats cards
+        figs: Dict mapping each figure tab to the figure as JSON
+    """
+    data, callbacks, snapshot = warm_up_state
+    rankings, progress = callbacks.country_rankings, callbacks.vaccination_progress
+    view = data.view(country, snapshot=snapshot)
+    builds = {"sparkline": lambda: callbacks.top_stats.sparkline_fig(view)}
+    if country == "Global":
+        for tab in TABS:
+            builds[f"rankings-{tab}"] = lambda tab=tab: rankings.rankings_fig(
+                tab, snapshot
+            )
+            builds[f"map-{tab}"] = lambda tab=tab: progress.map_fig(
+                tab, snapshot=snapshot
+            )
+    else:
+        builds["progress"] = lambda: progress.pred_full_vacc_fig(view)
+    figs = {tab: pio.to_json(build(), validate=False) for tab, build in builds.items()}
+    return country, data.get_stats(view), figs
+
+
+def warm_up(data, callbacks, processes=0):
+    """
+    Precompute the stats and figures of every country in the dropdown into the
+    caches, so the first visit of a country is as fast as the next ones.
+    Run it before gunicorn forks (--preload) to share the caches with all workers.
+    Params:
+        data: The VaccinationData
+        callbacks: The Callbacks whose caches to fill
+        processes: Number of processes building the pages, this process if 0 or 1
+    Returns:
+        report: Dict with the number of countries and figures, the time taken and
+            the memory used
+    """
+    global warm_up_state
+    start = time.perf_counter()
+    snapshot = data.snapshot
+    countries = [option["label"] for option in snapshot.dropdown_options]
+    warm_up_state = (data, callbacks, snapshot)
+    try:
+        if processes > 1 and "fork" in multiprocessing.get_all_start_methods():
+            pool = multiprocessing.get_context("fork").Pool(processes)
+            try:
+                results = pool.map(build_country, countries)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = map(build_country, countries)
+
+        num_figs = 0
+        for country, stats, figs in results:
+            if data.version != snapshot.version:
+                break  # Data was refreshed meanwhile, the results are outdated
+            data.put(("stats", country), stats, snapshot.version)
+            for tab, fig_json in figs.items():
+                key = callbacks.figure_key(country, tab, snapshot.version)
+                callbacks.fig_cache.put(key, fig_json)
+            num_figs += len(figs)
+    finally:
+        warm_up_state = None
+
+    # ru_maxrss is in kilobytes on Linux
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    workers_max_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    report = {
+        "countries": len(countries),
+        "figures": num_figs,
+        "seconds": round(time.perf_counter() - start, 3),
+        "figure_cache_bytes": callbacks.fig_cache.stats()["bytes"],
+        "max_rss_mb": max_rss // 1024,
+        "workers_max_rss_mb": workers_max_rss // 1024,
+    }
+    logger.info(
+        "Warmed up %d countries (%d figures, %d bytes) in %.2fs, max RSS %d MB, "
+        "workers %d MB",
+        report["countries"],
+        report["figures"],
+        report["figure_cache_bytes"],
+        report["seconds"],
+        report["max_rss_mb"],
+        report["workers_max_rss_mb"],
+    )
+    return report
\ No newline at end of file